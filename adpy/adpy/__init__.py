@@ -1,118 +1,38 @@
 import datetime
+from .compress import compression,open_file
+from .mesh import Mesh,Boundaries,read_mesh
+from .cache import MeshCache,load_mesh
+from .lazy import LazyMesh
+from .output import OutputHeader,read_output_header,iter_fort63,read_maxele,Fort63Index
+from .output import DRY,iter_fort63_sparse,read_maxele_sparse,write_output
+from .netcdf import is_netcdf,read_maxele_nc,iter_fort63_nc,Fort63NC
+from .parallel import read_mesh_parallel,read_maxele_parallel
+from .control import Fort15,read_fort15
+from .probe import Probe,probe
+from .coast import coastline_nodes,coastline_edges,distance_to_coast
 
 def read_fort14(file):
 	#open fort.14 file
 	#Brent: fort.14 file is a bunch of matrix numbers 
-	f=open(file,'r')
-	#print('Reading fort.14 file')
-
-	#parse the file accordingly
-	AGRID=(f.readline())[:-1]  #Descriptor
-	tmp=(f.readline()[:-1]).split()
-
-	NE=int(tmp[0]) #number of element
-	NP=int(tmp[1]) #number of nodes
-
-	X=['X'] 	#X coordinates of Nodes
-	Y=['Y']		#Y coordinates of Nodes
-	DP=['DP']	#bathymetric depths of Nodes
-	ETA=['Elevation']
-
-	for i in range(0,NP):
-		tmp=(f.readline()[:-1]).split()
-		X.append(float(tmp[1]))
-		Y.append(float(tmp[2]))
-		DP.append(float(tmp[3]))
-	
-	NM=[['NM(JE,1)','NM(JE,2)','NM(JE,3)']]		#connections
-
-	for i in range(0,NE):
-		tmp=(f.readline()[:-1]).split()
-		NM.append([int(tmp[2]),int(tmp[3]),int(tmp[4])])
-
-	f.close()
-
-	return AGRID,NE,NP,X,Y,DP,NM #return variables
+	#parsed in bulk by read_mesh, then converted to the 1-based lists
+	#(X[0]='X', Y[0]='Y', DP[0]='DP', NM[0]=column names) callers expect
+	return read_mesh(file).to_lists() #return variables
 
 def read_maxelev63(file):
 	#open maxelev.63
-	f=open(file,'r')
+	#parsed in bulk by read_maxele; NDSETSE keeps its old meaning
+	#(second value of the dataset header line)
+	header,time,IT,eta=read_maxele(file)
+	ETA=['Elevation']+eta.tolist()
 
-	ETA=['Elevation']
-	tmp=(f.readline()[:-1]).split()
-	RUNDES=tmp[0]
-	RUNID=tmp[1]
-	AGRID=tmp[2]
-
-	tmp=(f.readline()[:-1]).split()
-	NP=int(tmp[1])
-	tmp=(f.readline()[:-1]).split()
-	NDSETSE=int(tmp[1])	#number of iteration*300
-
-
-
-	for j in range(0,NP):
-		tmp=(f.readline()[:-1]).split()
-		ETA.append(float(tmp[1]))	
-
-	return RUNDES,RUNID,AGRID,NDSETSE,ETA
-	f.close()
+	return header.RUNDES,header.RUNID,header.AGRID,IT,ETA
 
 def getReferenceTime(fort15):
-	f=open(fort15,'r')
-
-	for i in range(0,7):
-		f.readline()
-	IM=(f.readline()[:-1]).split()
-	#print(int(IM[0]))
-	if(int(IM[0])==21):
-		f.readline()
-	for i in range(0,4):
-		f.readline()
-	NWP=(f.readline()[:-1]).split()
-	#print(int(NWP[0]))
-	for i in range(0,int(NWP[0])):
-		f.readline()
-	for i in range(0,5):
-		f.readline()
-	TAUO=(f.readline()[:-1]).split()
-	#print(int(TAUO[0]))
-	if(int(TAUO[0])==-5.0):
-		f.readline()
-	for i in range(0,3):
-		f.readline()
-	WTIMINC=(f.readline()[:-1]).split()
-	#print(WTIMINC)
-	referenceTime=datetime.datetime(int(WTIMINC[0]),int(WTIMINC[1]),int(WTIMINC[2]),int(WTIMINC[3]))
+	#control parameters are parsed once per file by read_fort15
+	referenceTime=read_fort15(fort15).referenceTime
 	print(referenceTime)
 	return referenceTime
 
 def getSimulationDuration(fort15):
-	f=open(fort15,'r')
-
-	for i in range(0,7):
-		f.readline()
-	IM=(f.readline()[:-1]).split()
-	#print(int(IM[0]))
-	if(int(IM[0])==21):
-		f.readline()
-	for i in range(0,4):
-		f.readline()
-	NWP=(f.readline()[:-1]).split()
-	#print(int(NWP[0]))
-	for i in range(0,int(NWP[0])):
-		f.readline()
-	for i in range(0,5):
-		f.readline()
-	TAUO=(f.readline()[:-1]).split()
-	#print(int(TAUO[0]))
-	if(int(TAUO[0])==-5.0):
-		f.readline()
-	for i in range(0,3):
-		f.readline()
-	WTIMINC=(f.readline()[:-1]).split()
-	#print(WTIMINC)
-	referenceTime=datetime.datetime(int(WTIMINC[0]),int(WTIMINC[1]),int(WTIMINC[2]),int(WTIMINC[3]))
-	RNDAY = (f.readline()[:-1]).split()
-	simulationDuration = float(RNDAY[0])
+	simulationDuration = read_fort15(fort15).RNDAY
 	return simulationDuration
@@ -0,0 +1,90 @@
+import sys
+from .mesh import read_mesh
+from .compress import open_file
+from .probe import probe
+from .cache import MeshCache
+from .output import Fort63Index,read_output_header,iter_fort63,write_output
+
+
+def cache_command(command,args):
+	cache_dir = None
+	if "--cache-dir" in args:
+		i = args.index("--cache-dir")
+		cache_dir = args[i+1]
+		del args[i:i+2]
+
+	for fort14 in args:
+		cache = MeshCache(fort14,cache_dir)
+		if command == "build":
+			cache.save(read_mesh(fort14))
+			print("cached",fort14,"in",cache.path)
+		elif command == "info":
+			manifest = cache.read_manifest()
+			if manifest is None:
+				print(fort14,": no cache")
+			else:
+				print(fort14,":",cache.path)
+				for key in sorted(manifest):
+					print("\t"+key+":",manifest[key])
+				print("\tvalid:",cache.is_valid(manifest))
+		elif command == "clear":
+			cache.clear()
+			print("cleared",cache.path)
+		else:
+			print("Unknown command: 'cache "+command+"'")
+			return
+
+
+def index_command(args):
+	for fort63 in args:
+		index = Fort63Index(fort63)
+		print(fort63,":",len(index),"timesteps indexed in",index.index_file)
+		if len(index):
+			print("\tfirst:",index.times[0],"s\tlast:",index.times[-1],"s")
+
+
+def sparse_command(source,target):
+	with open_file(source,'r') as f:
+		header = read_output_header(f)
+	n = write_output(target,header,iter_fort63(source),sparse=True)
+	print("wrote",n,"sparse datasets to",target)
+
+
+def probe_command(args):
+	files = {}
+	for arg in args:
+		key, sep, value = arg.partition("=")
+		if key not in ("fort14","fort15","fort63","maxele63") or not sep:
+			print("Unknown argument: '"+arg+"'")
+			return
+		files[key] = value
+	record = probe(**files)
+	for key, value in sorted(record.as_dict().items()):
+		if value is not None and key != "mismatches":
+			print(key+"\t"+str(value))
+	for mismatch in record.mismatches:
+		print("mismatch\t"+mismatch)
+
+
+if __name__=="__main__":
+	programInfo = " This program manages the files adpy derives from ADCIRC inputs and outputs.\n cache build : parses fort.14 files and writes their binary caches\n cache info : prints the cache manifests and whether they are still valid\n cache clear : deletes the caches\n index : builds (or refreshes) the timestep index of fort.63 files\n probe : prints the header metadata of fort.14/fort.15/fort.63/maxele.63 files\n sparse : rewrites a full-format fort.63/maxele.63 in the sparse format (wet nodes only)\n"
+
+	#check for command line arguments:
+	if len(sys.argv) == 1:
+		print(programInfo)
+		print("use 'python -m adpy help' for usage")
+	elif sys.argv[1] == "help":
+		print("usage: 'python -m adpy cache <build|info|clear> <fort.14 file>* [--cache-dir <directory>]'")
+		print("       'python -m adpy index <fort.63 file>*'")
+		print("       'python -m adpy probe [fort14=<file>] [fort15=<file>] [fort63=<file>] [maxele63=<file>]'")
+		print("       'python -m adpy sparse <fort.63 or maxele.63 file> <output file>'")
+	elif sys.argv[1] == "cache" and len(sys.argv) > 3:
+		cache_command(sys.argv[2],sys.argv[3:])
+	elif sys.argv[1] == "index" and len(sys.argv) > 2:
+		index_command(sys.argv[2:])
+	elif sys.argv[1] == "probe" and len(sys.argv) > 2:
+		probe_command(sys.argv[2:])
+	elif sys.argv[1] == "sparse" and len(sys.argv) == 4:
+		sparse_command(sys.argv[2],sys.argv[3])
+	else:
+		print("Unknown command: '"+" ".join(sys.argv[1:])+"'")
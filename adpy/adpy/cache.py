@@ -0,0 +1,277 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+from .mesh import Mesh,read_mesh
+from .parallel import read_mesh_parallel
+
+CACHE_VERSION=1
+MESH_ARRAYS=['x','y','depth','triangles']
+
+
+def file_digest(file,blocksize=1<<20):
+	"""
+	Gets the sha1 hex digest of a file's content.
+
+	Parameters
+	----------
+	file : string
+		path of the file
+	blocksize : int
+		number of bytes hashed per read
+
+	Returns
+	-------
+		string
+	"""
+
+	h=hashlib.sha1()
+	with open(file,'rb') as f:
+		for block in iter(lambda: f.read(blocksize),b''):
+			h.update(block)
+	return h.hexdigest()
+
+
+class MeshCache:
+	"""
+	Binary sidecar cache of a parsed fort.14.
+
+	The cache is a directory (by default <fort.14>.cache next to the source file) holding one
+	.npy file per array and a manifest.json that records the size, modification time and sha1
+	of the source. Arrays are loaded memory-mapped, so opening a cached mesh costs milliseconds.
+
+	The cache is valid while the source size and sha1 match the manifest. The sha1 is only
+	recomputed when the modification time differs from the one recorded, so an untouched
+	fort.14 is never re-read.
+	"""
+
+	def __init__(self,fort14,cache_dir=None):
+		"""
+		Parameters
+		----------
+		fort14 : string
+			path of the fort.14 file
+		cache_dir : string
+			directory of the cache (defaults to <fort14>.cache)
+		"""
+
+		self.fort14=fort14
+		self.path=cache_dir if cache_dir is not None else fort14+".cache"
+		self.manifest_file=os.path.join(self.path,"manifest.json")
+
+	def read_manifest(self):
+		"""
+		Returns
+		-------
+			dict
+				the manifest, or None if there is no readable cache
+		"""
+
+		try:
+			with open(self.manifest_file,'r') as f:
+				manifest=json.load(f)
+		except (OSError,ValueError):
+			return None
+		if manifest.get('version')!=CACHE_VERSION:
+			return None
+		return manifest
+
+	def is_valid(self,manifest=None):
+		"""
+		Checks if the cache still describes the current content of the fort.14.
+
+		Parameters
+		----------
+		manifest : dict
+			already loaded manifest (read from disk if not given)
+
+		Returns
+		-------
+			bool
+		"""
+
+		if manifest is None:
+			manifest=self.read_manifest()
+		if manifest is None:
+			return False
+		st=os.stat(self.fort14)
+		if st.st_size!=manifest['size']:
+			return False
+		if st.st_mtime==manifest['mtime']:
+			return True
+		if file_digest(self.fort14)!=manifest['sha1']:
+			return False
+		#same content, only touched: remember the new mtime so the hash is not recomputed next time
+		manifest['mtime']=st.st_mtime
+		self.write_manifest(manifest)
+		return True
+
+	def write_manifest(self,manifest):
+		tmp=self.manifest_file+".tmp"
+		try:
+			with open(tmp,'w') as f:
+				json.dump(manifest,f,indent=1)
+			os.replace(tmp,self.manifest_file)
+		except OSError:
+			pass
+
+	def save_array(self,name,arr):
+		"""
+		Stores an extra array alongside the mesh and records it in the manifest.
+
+		Parameters
+		----------
+		name : string
+			array name
+		arr : numpy.ndarray
+			array to store
+		"""
+
+		manifest=self.read_manifest()
+		if manifest is None:
+			raise ValueError("no mesh cache at "+self.path)
+		np.save(os.path.join(self.path,name+".npy"),arr)
+		if name not in manifest['arrays']:
+			manifest['arrays'].append(name)
+		self.write_manifest(manifest)
+
+	def load_array(self,name,mmap_mode='r'):
+		"""
+		Parameters
+		----------
+		name : string
+			array name
+		mmap_mode : string
+			passed to numpy.load
+
+		Returns
+		-------
+			numpy.ndarray
+				the stored array, or None if it is not cached
+		"""
+
+		try:
+			return np.load(os.path.join(self.path,name+".npy"),mmap_mode=mmap_mode)
+		except OSError:
+			return None
+
+	def save(self,mesh):
+		"""
+		Writes mesh to the cache, replacing any previous content.
+
+		Parameters
+		----------
+		mesh : Mesh
+			mesh parsed from self.fort14
+		"""
+
+		self.begin(mesh.AGRID,mesh.NE,mesh.NP,dict((name,getattr(mesh,name)) for name in MESH_ARRAYS))
+
+	def begin(self,AGRID,NE,NP,arrays=None):
+		"""
+		Starts a new cache for the current content of the fort.14, replacing any previous content.
+		Arrays not given here can be added later with save_array.
+
+		Parameters
+		----------
+		AGRID : string
+			grid descriptor
+		NE : int
+			number of elements
+		NP : int
+			number of nodes
+		arrays : dict
+			arrays to store right away, by name
+		"""
+
+		arrays=arrays or {}
+		st=os.stat(self.fort14)
+		tmp=self.path+".tmp%d" % os.getpid()
+		shutil.rmtree(tmp,ignore_errors=True)
+		os.makedirs(tmp)
+		for name in arrays:
+			np.save(os.path.join(tmp,name+".npy"),arrays[name])
+		manifest={
+			'version':CACHE_VERSION,
+			'source':os.path.abspath(self.fort14),
+			'size':st.st_size,
+			'mtime':st.st_mtime,
+			'sha1':file_digest(self.fort14),
+			'AGRID':AGRID,
+			'NE':NE,
+			'NP':NP,
+			'arrays':list(arrays),
+		}
+		with open(os.path.join(tmp,"manifest.json"),'w') as f:
+			json.dump(manifest,f,indent=1)
+		self.clear()
+		os.rename(tmp,self.path)
+
+	def load(self,mmap_mode='r'):
+		"""
+		Loads the cached mesh.
+
+		Parameters
+		----------
+		mmap_mode : string
+			passed to numpy.load ('r' memory-maps the arrays read-only, None reads them in memory)
+
+		Returns
+		-------
+			Mesh
+				the cached mesh, or None if the cache is missing or stale
+		"""
+
+		manifest=self.read_manifest()
+		if not self.is_valid(manifest):
+			return None
+		arrays=[self.load_array(name,mmap_mode) for name in MESH_ARRAYS]
+		if any(arr is None for arr in arrays):
+			return None
+		return Mesh(manifest['AGRID'],*arrays)
+
+	def clear(self):
+		"""
+		Deletes the cache directory.
+		"""
+
+		shutil.rmtree(self.path,ignore_errors=True)
+
+
+def load_mesh(fort14,cache_dir=None,use_cache=True,workers=1):
+	"""
+	Reads a fort.14 through its binary cache.
+	The first call parses the ASCII file and writes the cache; later calls load the cached arrays
+	until the fort.14 changes. If the cache cannot be written (e.g. read-only directory) the parsed
+	mesh is still returned.
+
+	Parameters
+	----------
+	fort14 : string
+		path of the fort.14 file
+	cache_dir : string
+		directory of the cache (defaults to <fort14>.cache)
+	use_cache : bool
+		if False, always parse the ASCII file and leave the cache untouched
+	workers : int
+		number of processes used to parse the ASCII file (see read_mesh_parallel)
+
+	Returns
+	-------
+		Mesh
+	"""
+
+	parse=read_mesh if workers==1 else lambda file: read_mesh_parallel(file,workers)
+	if not use_cache:
+		return parse(fort14)
+	cache=MeshCache(fort14,cache_dir)
+	mesh=cache.load()
+	if mesh is None:
+		mesh=parse(fort14)
+		try:
+			cache.save(mesh)
+		except OSError as e:
+			print("could not write mesh cache",cache.path,e)
+	return mesh
+
@@ -0,0 +1,147 @@
+import numpy as np
+from .sphere import EARTH_RADIUS,unit_vectors,chord_to_distance
+
+try:
+	from scipy.spatial import cKDTree
+except ImportError:
+	cKDTree=None
+
+#coastline edges are split into points at most this far apart (meters, or units of x,y if not spherical)
+COAST_SPACING=50.0
+#bumped when distance_to_coast changes, so distances cached by an older version are not reused
+COAST_VERSION=3
+
+
+def is_coastline(IBTYPE):
+	"""
+	Checks if a land boundary type is a coastline: mainland (0, 10, 20, ...), island (1, 11, 21, ...) or
+	external barrier (3, 13, 23, ...) boundaries. Flux (2, 12, 22, ...) and internal barrier/weir
+	(4, 24, 5, 25, ...) boundaries are not.
+	"""
+
+	return IBTYPE%10 in (0,1,3)
+
+
+def coastline_nodes(boundaries):
+	"""
+	Gets the nodes on the coastline of a mesh.
+
+	Parameters
+	----------
+	boundaries : Boundaries
+		boundaries of the fort.14
+
+	Returns
+	-------
+		numpy.ndarray
+			sorted unique 0-based node indices of the mainland and island boundaries
+	"""
+
+	segments=[nodes for IBTYPE,nodes in boundaries.landSegments if is_coastline(IBTYPE)]
+	if not segments:
+		return np.zeros(0,dtype=np.int32)
+	return np.unique(np.concatenate(segments))
+
+
+def coastline_edges(boundaries):
+	"""
+	Gets the edges of the coastline of a mesh: consecutive nodes of the coastline boundaries (see
+	is_coastline), island boundaries being closed back to their first node.
+
+	Parameters
+	----------
+	boundaries : Boundaries
+		boundaries of the fort.14
+
+	Returns
+	-------
+		numpy.ndarray
+			(n,2) 0-based node indices of the ends of every edge
+	"""
+
+	edges=[]
+	for IBTYPE,nodes in boundaries.landSegments:
+		if not is_coastline(IBTYPE) or len(nodes)==0:
+			continue
+		nodes=np.asarray(nodes)
+		if IBTYPE%10==1 and nodes[0]!=nodes[-1]:
+			nodes=np.append(nodes,nodes[0])
+		if len(nodes)==1:
+			nodes=np.append(nodes,nodes[0])
+		edges.append(np.column_stack([nodes[:-1],nodes[1:]]))
+	if not edges:
+		return np.zeros((0,2),dtype=np.int32)
+	return np.concatenate(edges)
+
+
+def densify_edges(points,edges,spacing):
+	"""
+	Splits edges between points into points at most spacing apart.
+
+	Parameters
+	----------
+	points : numpy.ndarray
+		(N,d) coordinates (unit vectors for spherical coordinates)
+	edges : numpy.ndarray
+		(n,2) indices into points of the ends of every edge
+	spacing : float
+		maximum distance between consecutive points, in the units of points
+
+	Returns
+	-------
+		numpy.ndarray
+			(m,d) points along the edges, the ends included
+	"""
+
+	start,end=points[edges[:,0]],points[edges[:,1]]
+	lengths=np.sqrt(((end-start)**2).sum(axis=1))
+	steps=np.maximum(np.ceil(lengths/spacing).astype(np.int64),1)
+	owner=np.repeat(np.arange(len(edges)),steps+1)
+	offsets=np.arange(len(owner))-np.repeat(np.cumsum(steps+1)-(steps+1),steps+1)
+	t=(offsets/steps[owner])[:,None]
+	return start[owner]+t*(end[owner]-start[owner])
+
+
+def distance_to_coast(x,y,boundaries,spherical=True,spacing=COAST_SPACING):
+	"""
+	Computes, for every mesh node, the distance to the coastline of the mesh: the edges between
+	consecutive nodes of the coastline boundaries (see coastline_edges).
+	The edges are split into points at most spacing apart and the distance is the one to the nearest
+	of these points, so it overestimates the distance to the edges by at most spacing/2. On the sphere
+	(radius adpy.sphere.EARTH_RADIUS), distances are within 0.6% of the WGS-84 ones.
+	Requires scipy (pip install adpy[coast]).
+
+	Parameters
+	----------
+	x,y : numpy.ndarray
+		node coordinates of the fort.14
+	boundaries : Boundaries
+		boundaries of the fort.14
+	spherical : bool
+		True if x,y are longitudes and latitudes (distances in meters along the earth's surface),
+		False for cartesian coordinates (distances in the units of x,y)
+	spacing : float
+		largest distance between the points the edges are split into (meters, or units of x,y)
+
+	Returns
+	-------
+		numpy.ndarray
+			float32 distance of every node, inf for all nodes if the mesh has no coastline
+	"""
+
+	if cKDTree is None:
+		raise ImportError("scipy is required to compute distances to the coast")
+	edges=coastline_edges(boundaries)
+	if len(edges)==0:
+		return np.full(len(x),np.inf,dtype=np.float32)
+
+	if spherical:
+		points=unit_vectors(x,y)
+		#edges are split along their chords, which are within meters of the arcs for mesh edges
+		coast=densify_edges(points,edges,spacing/EARTH_RADIUS)
+		chord,nearest=cKDTree(coast).query(points)
+		distance=chord_to_distance(chord)
+	else:
+		points=np.column_stack([x,y]).astype(np.float64)
+		distance,nearest=cKDTree(densify_edges(points,edges,spacing)).query(points)
+	return distance.astype(np.float32)
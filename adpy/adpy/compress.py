@@ -0,0 +1,106 @@
+import io
+import gzip
+import bz2
+import lzma
+
+try:
+	import zstandard
+except ImportError:
+	zstandard=None
+
+#first bytes of the compressed formats adpy reads transparently
+MAGIC=[
+	(b'\x1f\x8b','gzip'),
+	(b'\x28\xb5\x2f\xfd','zstd'),
+	(b'BZh','bz2'),
+	(b'\xfd7zXZ\x00','xz'),
+]
+
+BUFFERSIZE=1<<20
+
+
+def compression(file):
+	"""
+	Detects the compression of a file from its first bytes.
+
+	Parameters
+	----------
+	file : string
+		path of the file
+
+	Returns
+	-------
+		string
+			'gzip', 'zstd', 'bz2', 'xz', or None for an uncompressed file
+	"""
+
+	with open(file,'rb') as f:
+		head=f.read(6)
+	for magic,kind in MAGIC:
+		if head.startswith(magic):
+			return kind
+	return None
+
+
+def open_file(file,mode='r'):
+	"""
+	Opens a file for reading, decompressing gzip, zstd, bz2 and xz files on the fly.
+	Uncompressed files are opened with the builtin open, so callers can use this everywhere.
+
+	Parameters
+	----------
+	file : string
+		path of the file
+	mode : string
+		'r' for text or 'rb' for bytes
+
+	Returns
+	-------
+		file object
+	"""
+
+	kind=compression(file)
+	if kind is None:
+		return open(file,mode)
+
+	if kind=='gzip':
+		raw=gzip.open(file,'rb')
+	elif kind=='bz2':
+		raw=bz2.open(file,'rb')
+	elif kind=='xz':
+		raw=lzma.open(file,'rb')
+	else:
+		if zstandard is None:
+			raise ImportError("zstandard is required to read "+file)
+		reader=zstandard.ZstdDecompressor().stream_reader(open(file,'rb'),closefd=True,read_across_frames=True)
+		raw=io.BufferedReader(reader,BUFFERSIZE)
+
+	if 'b' in mode:
+		return raw
+	return io.TextIOWrapper(raw)
+
+
+def skip_to(f,offset):
+	"""
+	Moves a file opened with open_file to an offset (in uncompressed bytes) at or after its position.
+	Streams that cannot seek are read forward.
+
+	Parameters
+	----------
+	f : file object
+		binary file object
+	offset : int
+		target offset
+	"""
+
+	if f.seekable():
+		f.seek(offset)
+		return
+	remaining=offset-f.tell()
+	if remaining<0:
+		raise ValueError("cannot seek backwards in a compressed stream")
+	while remaining>0:
+		block=f.read(min(remaining,BUFFERSIZE))
+		if not block:
+			break
+		remaining-=len(block)
@@ -0,0 +1,134 @@
+import os
+import datetime
+from .compress import open_file
+
+#output parameters that fort.15 files label in their trailing comments, e.g.
+#"0 0.0 3.0 360   ! NOUTGE, TOUTSGE, TOUTFGE, NSPOOLGE"
+OUTPUT_LABELS=['NOUTE','NOUTV','NOUTM','NOUTC','NOUTW','NOUTGE','NOUTGV','NOUTGC','NOUTGW']
+
+fort15Cache={}
+
+
+class Fort15:
+	"""
+	Model control parameters read from the header of a fort.15.
+
+	Attributes follow the ADCIRC names. The section up to RNDAY is parsed by position:
+	RUNDES, RUNID, NFOVER, NABOUT, NSCREEN, IHOT, ICS, IM, IDEN (IM=21 only), NOLIBF, NOLIFA,
+	NOLICA, NOLICAT, NWP, AttrNames, NCOR, NTIP, NWS, NRAMP, G, TAU0, DTDP, STATIM, REFTIM,
+	WTIMINC (raw values of the meteorological line) and RNDAY.
+
+	referenceTime is the datetime given by the first four values of the WTIMINC line
+	(year, month, day, hour), or None if that line does not hold a date.
+
+	The position of the output control lines depends on the tidal and boundary forcing sections,
+	so they are picked from their trailing comment labels instead: outputs maps a label such as
+	'NOUTGE' to the values of its line, e.g. (NOUTGE,TOUTSGE,TOUTFGE,NSPOOLGE).
+	"""
+
+	def __init__(self,file):
+		"""
+		Parameters
+		----------
+		file : string
+			path of the fort.15 file
+		"""
+
+		self.file=file
+		with open_file(file,'r') as f:
+			lines=f.read().splitlines()
+		self.parse(lines)
+
+	def parse(self,lines):
+		lines=iter(lines)
+
+		def values():
+			return next(lines).split('!')[0].split()
+
+		self.RUNDES=next(lines).split('!')[0].strip()
+		self.RUNID=next(lines).split('!')[0].strip()
+		self.NFOVER=int(values()[0])
+		self.NABOUT=int(values()[0])
+		self.NSCREEN=int(values()[0])
+		self.IHOT=int(values()[0])
+		self.ICS=int(values()[0])
+		self.IM=int(values()[0])
+		self.IDEN=int(values()[0]) if self.IM==21 else None
+		self.NOLIBF=int(values()[0])
+		self.NOLIFA=int(values()[0])
+		self.NOLICA=int(values()[0])
+		self.NOLICAT=int(values()[0])
+		self.NWP=int(values()[0])
+		self.AttrNames=[next(lines).strip() for i in range(0,self.NWP)]
+		self.NCOR=int(values()[0])
+		self.NTIP=int(values()[0])
+		self.NWS=int(values()[0])
+		self.NRAMP=int(values()[0])
+		self.G=float(values()[0])
+		self.TAU0=float(values()[0])
+		if self.TAU0==-5.0:
+			self.Tau0FullDomainMin,self.Tau0FullDomainMax=[float(i) for i in values()[:2]]
+		self.DTDP=float(values()[0])
+		self.STATIM=float(values()[0])
+		self.REFTIM=float(values()[0])
+		self.WTIMINC=values()
+		try:
+			self.referenceTime=datetime.datetime(*[int(i) for i in self.WTIMINC[:4]])
+		except (ValueError,TypeError):
+			self.referenceTime=None
+		self.RNDAY=float(values()[0])
+
+		self.outputs={}
+		for line in lines:
+			if '!' not in line:
+				continue
+			data,comment=line.split('!',1)
+			labels=comment.replace(',',' ').split()
+			if labels and labels[0] in OUTPUT_LABELS and labels[0] not in self.outputs:
+				self.outputs[labels[0]]=tuple(parse_number(i) for i in data.split())
+
+	@property
+	def simulationDuration(self):
+		#RNDAY, in days
+		return self.RNDAY
+
+	@property
+	def simulationEndTime(self):
+		if self.referenceTime is None:
+			return None
+		return self.referenceTime+datetime.timedelta(days=self.RNDAY)
+
+	def __repr__(self):
+		return "Fort15(RUNID=%r, referenceTime=%s, RNDAY=%g, DTDP=%g)" % (self.RUNID,self.referenceTime,self.RNDAY,self.DTDP)
+
+
+def parse_number(value):
+	try:
+		return int(value)
+	except ValueError:
+		return float(value)
+
+
+def read_fort15(file):
+	"""
+	Reads the control parameters of a fort.15.
+	Results are memoized per file (path, size and modification time), so repeated calls do not
+	re-read an unchanged fort.15.
+
+	Parameters
+	----------
+	file : string
+		path of the fort.15 file
+
+	Returns
+	-------
+		Fort15
+	"""
+
+	st=os.stat(file)
+	key=(os.path.abspath(file),st.st_size,st.st_mtime)
+	if key not in fort15Cache:
+		for old in [k for k in fort15Cache if k[0]==key[0]]:
+			del fort15Cache[old]
+		fort15Cache[key]=Fort15(file)
+	return fort15Cache[key]
@@ -0,0 +1,191 @@
+import itertools
+import numpy as np
+from .compress import compression,open_file,skip_to
+from .mesh import Mesh,read_table,read_boundaries
+from .cache import MeshCache
+from .parallel import find_line_offsets
+from .coast import COAST_VERSION,distance_to_coast
+
+#attribute -> section of the fort.14 it is read from
+SECTIONS={'x':'nodes','y':'nodes','depth':'depth','triangles':'elements'}
+
+
+class LazyMesh:
+	"""
+	Handle on a fort.14 whose sections are read on first access.
+
+	x and y (node coordinates), depth, triangles (0-based element connectivity) and boundaries
+	are each parsed the first time they are used and can be released again with drop. A run that
+	only needs node coordinates never parses the element table.
+
+	When the binary mesh cache is enabled, arrays found in the cache are memory-mapped instead of
+	parsed, and arrays parsed from the ASCII file are added to the cache for the next run.
+
+	coastDistance (distance of every node to the coastline, see coast.distance_to_coast) is derived
+	from x, y and boundaries the first time it is used and cached the same way.
+	"""
+
+	def __init__(self,fort14,cache_dir=None,use_cache=True):
+		"""
+		Parameters
+		----------
+		fort14 : string
+			path of the fort.14 file
+		cache_dir : string
+			directory of the binary cache (defaults to <fort14>.cache)
+		use_cache : bool
+			if False, always parse the ASCII file and leave the cache untouched
+		"""
+
+		self.fort14=fort14
+		self.arrays={}
+		self.loadedBoundaries=None
+		with open_file(fort14,'rb') as f:
+			self.AGRID=f.readline().decode('ascii').rstrip('\r\n')
+			tmp=f.readline().split()
+			self.NE=int(tmp[0])
+			self.NP=int(tmp[1])
+			#byte offsets (in uncompressed bytes) of the sections, filled in as they are found
+			self.offsets={'nodes':f.tell()}
+
+		self.cache=None
+		if use_cache:
+			cache=MeshCache(fort14,cache_dir)
+			try:
+				if not cache.is_valid():
+					cache.begin(self.AGRID,self.NE,self.NP)
+				self.cache=cache
+			except OSError as e:
+				print("could not write mesh cache",cache.path,e)
+
+	def __repr__(self):
+		return "LazyMesh(AGRID=%r, NE=%d, NP=%d, loaded=%s)" % (self.AGRID,self.NE,self.NP,sorted(self.arrays))
+
+	@property
+	def x(self):
+		return self.get('x')
+
+	@property
+	def y(self):
+		return self.get('y')
+
+	@property
+	def depth(self):
+		return self.get('depth')
+
+	@property
+	def triangles(self):
+		return self.get('triangles')
+
+	@property
+	def boundaries(self):
+		if self.loadedBoundaries is None:
+			with open_file(self.fort14,'rb') as f:
+				skip_to(f,self.section_offset('boundaries'))
+				self.loadedBoundaries=read_boundaries(f)
+		return self.loadedBoundaries
+
+	@property
+	def coastDistance(self):
+		if 'coastDistance' not in self.arrays:
+			#cached under a versioned name, so distances computed by an older distance_to_coast are not reused
+			name='coastDistance%d' % COAST_VERSION
+			cached=self.cache.load_array(name) if self.cache is not None else None
+			if cached is None:
+				cached=distance_to_coast(self.x,self.y,self.boundaries)
+				if self.cache is not None:
+					try:
+						self.cache.save_array(name,cached)
+					except (OSError,ValueError) as e:
+						print("could not write mesh cache",self.cache.path,e)
+			self.arrays['coastDistance']=cached
+		return self.arrays['coastDistance']
+
+	def get(self,name):
+		if name not in self.arrays:
+			self.load(SECTIONS[name])
+		return self.arrays[name]
+
+	def load(self,section):
+		"""
+		Loads the arrays of a section ('nodes', 'depth' or 'elements'), from the cache if possible.
+		"""
+
+		names=[name for name in SECTIONS if SECTIONS[name]==section]
+		if self.cache is not None:
+			cached=[self.cache.load_array(name) for name in names]
+			if all(arr is not None for arr in cached):
+				self.arrays.update(zip(names,cached))
+				return
+
+		if section=='elements':
+			table=self.read_section('elements',self.NE,5,np.int32)
+			arrays={'triangles':table[:,2:5]-1}
+		else:
+			table=self.read_section('nodes',self.NP,4,np.float64)
+			if section=='nodes':
+				arrays={'x':table[:,1],'y':table[:,2]}
+			else:
+				arrays={'depth':table[:,3]}
+		#copy the columns so the parsed table itself is released
+		arrays=dict((name,np.ascontiguousarray(arrays[name])) for name in arrays)
+		self.arrays.update(arrays)
+
+		if self.cache is not None:
+			try:
+				for name in arrays:
+					self.cache.save_array(name,arrays[name])
+			except (OSError,ValueError) as e:
+				print("could not write mesh cache",self.cache.path,e)
+
+	def drop(self,*names):
+		"""
+		Releases loaded arrays; they are read again on next access.
+
+		Parameters
+		----------
+		names : strings
+			attribute names ('x', 'y', 'depth', 'triangles', 'boundaries', 'coastDistance'); all if none are given
+		"""
+
+		if not names:
+			names=list(SECTIONS)+['boundaries','coastDistance']
+		for name in names:
+			if name=='boundaries':
+				self.loadedBoundaries=None
+			else:
+				self.arrays.pop(name,None)
+
+	def read_section(self,section,nrows,ncols,dtype):
+		with open_file(self.fort14,'rb') as f:
+			skip_to(f,self.section_offset(section))
+			table=read_table(f,nrows,ncols,dtype)
+			following={'nodes':'elements','elements':'boundaries'}[section]
+			self.offsets.setdefault(following,f.tell())
+		return table
+
+	def section_offset(self,section):
+		"""
+		Gets the byte offset of a section ('nodes', 'elements' or 'boundaries'), locating it by
+		counting the lines of the preceding sections without parsing them.
+		"""
+
+		if section not in self.offsets:
+			previous,count={'elements':('nodes',self.NP),'boundaries':('elements',self.NE)}[section]
+			start=self.section_offset(previous)
+			with open_file(self.fort14,'rb') as f:
+				if compression(self.fort14) is None:
+					self.offsets[section],=find_line_offsets(f,start,[count])
+				else:
+					skip_to(f,start)
+					for line in itertools.islice(f,count):
+						pass
+					self.offsets[section]=f.tell()
+		return self.offsets[section]
+
+	def to_mesh(self,boundaries=False):
+		"""
+		Gets a Mesh holding all the arrays (loading the ones not loaded yet).
+		"""
+
+		return Mesh(self.AGRID,self.x,self.y,self.depth,self.triangles,self.boundaries if boundaries else None)
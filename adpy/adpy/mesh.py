@@ -0,0 +1,207 @@
+import itertools
+import numpy as np
+from .compress import open_file
+
+
+class Mesh:
+	"""
+	Nodes and elements of a fort.14 grid stored as contiguous numpy arrays.
+
+	Node coordinates and depths are float64 arrays of length NP. Element connectivity is an
+	(NE,3) int32 array of 0-based node indices, so mesh.x[mesh.triangles] gives the vertex
+	coordinates of every element.
+	"""
+
+	def __init__(self,AGRID,x,y,depth,triangles,boundaries=None):
+		"""
+		Parameters
+		----------
+		AGRID : string
+			grid descriptor (first line of fort.14)
+		x : numpy.ndarray
+			x coordinates(longitude) of the nodes
+		y : numpy.ndarray
+			y coordinates(latitude) of the nodes
+		depth : numpy.ndarray
+			bathymetric depths of the nodes
+		triangles : numpy.ndarray
+			(NE,3) array of 0-based node indices of each element
+		boundaries : Boundaries
+			open and land boundary segments (None if they were not read)
+		"""
+
+		self.AGRID=AGRID
+		self.x=x
+		self.y=y
+		self.depth=depth
+		self.triangles=triangles
+		self.boundaries=boundaries
+
+	@property
+	def NE(self):
+		return len(self.triangles)
+
+	@property
+	def NP(self):
+		return len(self.x)
+
+	def __repr__(self):
+		return "Mesh(AGRID=%r, NE=%d, NP=%d)" % (self.AGRID,self.NE,self.NP)
+
+	def to_lists(self):
+		"""
+		Gets the legacy list view of the mesh, as returned by read_fort14.
+		Lists are 1-based: index 0 holds a header ('X','Y','DP' or the NM column names).
+
+		Returns
+		-------
+			7-tuple
+				AGRID,NE,NP,X,Y,DP,NM
+		"""
+
+		X=['X']+self.x.tolist()
+		Y=['Y']+self.y.tolist()
+		DP=['DP']+self.depth.tolist()
+		NM=[['NM(JE,1)','NM(JE,2)','NM(JE,3)']]+(self.triangles+1).tolist()
+		return self.AGRID,self.NE,self.NP,X,Y,DP,NM
+
+
+class Boundaries:
+	"""
+	Open and land boundary segments listed after the element table of a fort.14.
+
+	openSegments is a list of 0-based node index arrays (one per open boundary segment).
+	landSegments is a list of (IBTYPE, 0-based node index array) tuples. For barrier types that
+	list extra values per node (heights, coefficients, connected back nodes), only the first node
+	of each line is kept.
+	"""
+
+	def __init__(self,openSegments,landSegments):
+		self.openSegments=openSegments
+		self.landSegments=landSegments
+
+	@property
+	def NOPE(self):
+		return len(self.openSegments)
+
+	@property
+	def NETA(self):
+		return sum(len(nodes) for nodes in self.openSegments)
+
+	@property
+	def NBOU(self):
+		return len(self.landSegments)
+
+	@property
+	def NVEL(self):
+		return sum(len(nodes) for IBTYPE,nodes in self.landSegments)
+
+	def __repr__(self):
+		return "Boundaries(NOPE=%d, NETA=%d, NBOU=%d, NVEL=%d)" % (self.NOPE,self.NETA,self.NBOU,self.NVEL)
+
+
+def read_segment_nodes(f,n):
+	#first value of the next n lines, as 0-based node indices
+	return np.array([int(line.split()[0]) for line in itertools.islice(f,n)],dtype=np.int32)-1
+
+
+def read_boundaries(f):
+	"""
+	Reads the open and land boundary sections of a fort.14.
+
+	Parameters
+	----------
+	f : file object
+		fort.14 (text or binary mode) positioned right after the element table
+
+	Returns
+	-------
+		Boundaries
+	"""
+
+	tmp=f.readline().split()
+	if not tmp:
+		#grid without boundary information
+		return Boundaries([],[])
+	NOPE=int(tmp[0])
+	f.readline()	#NETA
+	openSegments=[]
+	for k in range(0,NOPE):
+		NVDLL=int(f.readline().split()[0])
+		openSegments.append(read_segment_nodes(f,NVDLL))
+
+	landSegments=[]
+	tmp=f.readline().split()
+	NBOU=int(tmp[0]) if tmp else 0
+	f.readline()	#NVEL
+	for k in range(0,NBOU):
+		tmp=f.readline().split()
+		NVELL=int(tmp[0])
+		IBTYPE=int(tmp[1]) if len(tmp)>1 else 0
+		landSegments.append((IBTYPE,read_segment_nodes(f,NVELL)))
+	return Boundaries(openSegments,landSegments)
+
+
+def read_table(f,nrows,ncols,dtype):
+	"""
+	Bulk-parses the next nrows whitespace separated lines of f into an (nrows,ncols) array.
+
+	Parameters
+	----------
+	f : file object
+		opened ADCIRC file (text or binary mode) positioned at the first row of the table
+	nrows : int
+		number of lines to read
+	ncols : int
+		number of columns per line
+	dtype : numpy dtype
+		type of the returned array
+
+	Returns
+	-------
+		numpy.ndarray
+	"""
+
+	lines=list(itertools.islice(f,nrows))
+	if lines and isinstance(lines[0],bytes):
+		values=b''.join(lines).decode('ascii').split()
+	else:
+		values=''.join(lines).split()
+	if len(values)!=nrows*ncols:
+		raise ValueError("expected %d rows of %d columns, got %d values" % (nrows,ncols,len(values)))
+	if np.dtype(dtype).kind=='f':
+		return np.array(values,dtype=np.float64).astype(dtype,copy=False).reshape(nrows,ncols)
+	return np.array(values,dtype=np.int64).astype(dtype,copy=False).reshape(nrows,ncols)
+
+
+def read_mesh(file,boundaries=False):
+	"""
+	Reads the node and element tables of a fort.14 file into a Mesh.
+
+	Parameters
+	----------
+	file : string
+		path of the fort.14 file
+	boundaries : bool
+		if True, also read the boundary sections into mesh.boundaries
+
+	Returns
+	-------
+		Mesh
+	"""
+
+	with open_file(file,'r') as f:
+		AGRID=(f.readline()).rstrip('\r\n')
+		tmp=f.readline().split()
+		NE=int(tmp[0])
+		NP=int(tmp[1])
+
+		nodes=read_table(f,NP,4,np.float64)
+		elements=read_table(f,NE,5,np.int32)
+		segments=read_boundaries(f) if boundaries else None
+
+	x=np.ascontiguousarray(nodes[:,1])
+	y=np.ascontiguousarray(nodes[:,2])
+	depth=np.ascontiguousarray(nodes[:,3])
+	triangles=np.ascontiguousarray(elements[:,2:5])-1
+	return Mesh(AGRID,x,y,depth,triangles,segments)
@@ -0,0 +1,195 @@
+import numpy as np
+
+try:
+	import netCDF4
+except ImportError:
+	netCDF4=None
+
+#first bytes of netCDF classic/64-bit offset files and of netCDF-4 (HDF5) files
+NETCDF_MAGIC=(b'CDF\x01',b'CDF\x02',b'CDF\x05',b'\x89HDF')
+
+
+def is_netcdf(file):
+	"""
+	Checks if a file is a netCDF file by looking at its first bytes.
+
+	Parameters
+	----------
+	file : string
+		path of the file
+
+	Returns
+	-------
+		bool
+	"""
+
+	with open(file,'rb') as f:
+		return f.read(4) in NETCDF_MAGIC
+
+
+def open_dataset(file):
+	if netCDF4 is None:
+		raise ImportError("netCDF4 is required to read "+file)
+	ds=netCDF4.Dataset(file,'r')
+	#keep ADCIRC's -99999 dry value instead of masked arrays, like the ASCII files
+	ds.set_auto_mask(False)
+	return ds
+
+
+def read_netcdf_header(ds,NDSETSE):
+	"""
+	Builds the OutputHeader of an ADCIRC netCDF output from its global attributes.
+	"""
+
+	#imported here because output imports this module
+	from .output import OutputHeader
+
+	attrs=ds.__dict__
+	times=ds.variables['time'] if 'time' in ds.variables else []
+	DTDP=float(times[1]-times[0]) if len(times)>1 else 0.0
+	return OutputHeader(
+		str(attrs.get('rundes','')).strip(),
+		str(attrs.get('runid','')).strip(),
+		str(attrs.get('agrid','')).strip(),
+		NDSETSE,len(ds.dimensions['node']),DTDP,0,1)
+
+
+def iteration(ds,time):
+	#netCDF output does not store the iteration; derive it from the model time step when known
+	dt=ds.__dict__.get('dt')
+	return int(round(time/float(dt))) if dt else 0
+
+
+def read_maxele_nc(file,nodes=None):
+	"""
+	Reads a maxele.63.nc like read_maxele reads the ASCII maxele.63.
+
+	Parameters
+	----------
+	file : string
+		path of the maxele.63.nc file
+	nodes : array-like
+		0-based indices of the nodes to read (all nodes if None)
+
+	Returns
+	-------
+		4-tuple
+			(OutputHeader, time in seconds, iteration, elevations as a float64 array)
+	"""
+
+	with open_dataset(file) as ds:
+		header=read_netcdf_header(ds,1)
+		zeta=ds.variables['zeta_max']
+		index=slice(None) if nodes is None else np.asarray(nodes)
+		if zeta.ndim==2:
+			eta=zeta[0,index]
+		else:
+			eta=zeta[index]
+		times=ds.variables['time'] if 'time' in ds.variables else [0.0]
+		time=float(times[-1]) if len(times) else 0.0
+		return header,time,iteration(ds,time),np.ascontiguousarray(eta,dtype=np.float64)
+
+
+class Fort63NC:
+	"""
+	Lazy reader of a fort.63.nc.
+
+	Only the slices that are asked for are read from disk, so a single timestep or a subset of
+	nodes can be extracted from a multi-GB file. Frames have the same layout as the ones of
+	iter_fort63 and Fort63Index.
+	"""
+
+	def __init__(self,file):
+		"""
+		Parameters
+		----------
+		file : string
+			path of the fort.63.nc file
+		"""
+
+		self.file=file
+		self.ds=open_dataset(file)
+		self.zeta=self.ds.variables['zeta']
+		self.times=np.asarray(self.ds.variables['time'][:],dtype=np.float64)
+		self.header=read_netcdf_header(self.ds,len(self.times))
+
+	def __len__(self):
+		return len(self.times)
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self,*exc):
+		self.close()
+
+	def close(self):
+		self.ds.close()
+
+	def find(self,seconds):
+		"""
+		Gets the timestep whose time is nearest to a given time.
+		"""
+
+		if len(self)==0:
+			raise IndexError("fort.63.nc has no timestep")
+		return int(np.argmin(np.abs(self.times-seconds)))
+
+	def read(self,n,nodes=None):
+		"""
+		Reads a single timestep.
+
+		Parameters
+		----------
+		n : int
+			index of the timestep (negative values count from the end)
+		nodes : array-like
+			0-based indices of the nodes to read (all nodes if None)
+
+		Returns
+		-------
+			3-tuple
+				(time in seconds, iteration, elevations)
+		"""
+
+		time=float(self.times[n])
+		index=slice(None) if nodes is None else np.asarray(nodes)
+		eta=np.asarray(self.zeta[n,index],dtype=np.float64)
+		return time,iteration(self.ds,time),eta
+
+	def read_time(self,seconds,nodes=None):
+		return self.read(self.find(seconds),nodes)
+
+	def iter_range(self,start=None,stop=None,step=None,nodes=None):
+		"""
+		Streams a range of timesteps.
+
+		Yields
+		------
+			3-tuple
+				(time in seconds, iteration, elevations)
+		"""
+
+		for n in range(*slice(start,stop,step).indices(len(self))):
+			yield self.read(n,nodes)
+
+
+def iter_fort63_nc(file,nodes=None):
+	"""
+	Streams the timesteps of a fort.63.nc like iter_fort63.
+
+	Parameters
+	----------
+	file : string
+		path of the fort.63.nc file
+	nodes : array-like
+		0-based indices of the nodes to read (all nodes if None)
+
+	Yields
+	------
+		3-tuple
+			(time in seconds, iteration, elevations)
+	"""
+
+	with Fort63NC(file) as reader:
+		for frame in reader.iter_range(nodes=nodes):
+			yield frame
@@ -0,0 +1,482 @@
+import os
+import itertools
+import numpy as np
+from .mesh import read_table
+from .compress import open_file,skip_to
+from .netcdf import is_netcdf,read_maxele_nc,iter_fort63_nc
+
+#value ADCIRC writes for dry nodes
+DRY=-99999.0
+
+
+class OutputHeader:
+	"""
+	Header of an ADCIRC ASCII global output file (fort.63, maxele.63, ...).
+
+	Attributes follow the ADCIRC names: RUNDES, RUNID and AGRID from the first line,
+	NDSETSE (number of datasets), NP (number of nodes), DTDP (seconds between datasets),
+	NSPOOLGE (timesteps between datasets) and IRTYPE (1 for scalars, 2 for vectors) from the second.
+	"""
+
+	def __init__(self,RUNDES,RUNID,AGRID,NDSETSE,NP,DTDP,NSPOOLGE,IRTYPE):
+		self.RUNDES=RUNDES
+		self.RUNID=RUNID
+		self.AGRID=AGRID
+		self.NDSETSE=NDSETSE
+		self.NP=NP
+		self.DTDP=DTDP
+		self.NSPOOLGE=NSPOOLGE
+		self.IRTYPE=IRTYPE
+
+	def __repr__(self):
+		return "OutputHeader(RUNID=%r, NDSETSE=%d, NP=%d, IRTYPE=%d)" % (self.RUNID,self.NDSETSE,self.NP,self.IRTYPE)
+
+
+def read_output_header(f):
+	"""
+	Reads the two header lines of an ADCIRC ASCII output file.
+
+	Parameters
+	----------
+	f : file object
+		file (text or binary mode) opened at its beginning
+
+	Returns
+	-------
+		OutputHeader
+	"""
+
+	lines=[f.readline(),f.readline()]
+	if isinstance(lines[0],bytes):
+		lines=[line.decode('ascii') for line in lines]
+
+	tmp=lines[0].split()
+	tmp+=['']*(3-len(tmp))
+	RUNDES,RUNID,AGRID=tmp[0],tmp[1],tmp[2]
+
+	tmp=lines[1].split()
+	NDSETSE=int(tmp[0])
+	NP=int(tmp[1])
+	DTDP=float(tmp[2]) if len(tmp)>2 else 0.0
+	NSPOOLGE=int(tmp[3]) if len(tmp)>3 else 0
+	IRTYPE=int(tmp[4]) if len(tmp)>4 else 1
+	return OutputHeader(RUNDES,RUNID,AGRID,NDSETSE,NP,DTDP,NSPOOLGE,IRTYPE)
+
+
+def is_sparse(tmp):
+	#sparse datasets have 4 header values: TIME IT NumNonDefault DefaultValue
+	return len(tmp)>=4
+
+
+def read_dataset(f,tmp,values):
+	"""
+	Parses one dataset into a preallocated buffer.
+	Both full datasets (NP node lines) and sparse datasets (only the nodes whose value differs
+	from the default of the dataset header) are read.
+
+	Parameters
+	----------
+	f : file object
+		file positioned after the dataset header line
+	tmp : list
+		values of the dataset header line
+	values : numpy.ndarray
+		(NP,ncols) buffer that receives the node values
+	"""
+
+	NP,ncols=values.shape
+	if is_sparse(tmp):
+		table=read_table(f,int(tmp[2]),ncols+1,np.float64)
+		values.fill(float(tmp[3]))
+		values[table[:,0].astype(np.intp)-1]=table[:,1:]
+	else:
+		values[:]=read_table(f,NP,ncols+1,np.float64)[:,1:]
+
+
+def read_sparse_dataset(f,tmp,NP,ncols,default):
+	"""
+	Parses one dataset into a compact (index,values) pair holding only the nodes that differ
+	from default.
+
+	Returns
+	-------
+		2-tuple
+			(0-based int32 node indices, values of those nodes)
+	"""
+
+	if is_sparse(tmp) and float(tmp[3])==default:
+		table=read_table(f,int(tmp[2]),ncols+1,np.float64)
+		index=table[:,0].astype(np.int32)-1
+		values=table[:,1:]
+	else:
+		dense=np.empty((NP,ncols),dtype=np.float64)
+		read_dataset(f,tmp,dense)
+		index=np.flatnonzero((dense!=default).any(axis=1)).astype(np.int32)
+		values=dense[index]
+	return index,(values[:,0].copy() if ncols==1 else values)
+
+
+def read_maxele(file):
+	"""
+	Reads the first dataset of a maxele.63 (maximum elevation of every node).
+	Sparse files are expanded, dry nodes getting the default value of the dataset.
+	A maxele.63.nc is read with read_maxele_nc.
+
+	Parameters
+	----------
+	file : string
+		path of the maxele.63 file
+
+	Returns
+	-------
+		4-tuple
+			(OutputHeader, time in seconds, iteration, elevations as a float64 array of length NP)
+	"""
+
+	if is_netcdf(file):
+		return read_maxele_nc(file)
+	with open_file(file,'r') as f:
+		header=read_output_header(f)
+		tmp=f.readline().split()
+		time=float(tmp[0])
+		it=int(tmp[1])
+		eta=np.empty((header.NP,1),dtype=np.float64)
+		read_dataset(f,tmp,eta)
+	return header,time,it,eta[:,0]
+
+
+def read_maxele_sparse(file,default=DRY):
+	"""
+	Reads the first dataset of a maxele.63 as a compact pair of the wet nodes only.
+	Sparse files are read without expanding the dry nodes.
+
+	Parameters
+	----------
+	file : string
+		path of the maxele.63 file
+	default : float
+		value of the nodes left out (dry nodes by default)
+
+	Returns
+	-------
+		5-tuple
+			(OutputHeader, time in seconds, iteration, 0-based node indices, elevations of those nodes)
+	"""
+
+	with open_file(file,'r') as f:
+		header=read_output_header(f)
+		tmp=f.readline().split()
+		index,values=read_sparse_dataset(f,tmp,header.NP,1,default)
+	return header,float(tmp[0]),int(tmp[1]),index,values
+
+
+def iter_fort63(file,copy=False):
+	"""
+	Streams the datasets of a fort.63 (or any ADCIRC ASCII output file, full or sparse) one timestep at a time.
+	Each timestep is parsed into the same preallocated buffer, so memory does not grow with NDSETSE.
+	A fort.63.nc is streamed with iter_fort63_nc.
+
+	Parameters
+	----------
+	file : string
+		path of the fort.63 file
+	copy : bool
+		if False (default) the yielded array is reused and overwritten by the next timestep;
+		set to True to get an independent array per timestep.
+
+	Yields
+	------
+		3-tuple
+			(time in seconds, iteration, elevations). Elevations have shape (NP,) for scalar
+			output (IRTYPE 1) and (NP,IRTYPE) otherwise.
+	"""
+
+	if is_netcdf(file):
+		for frame in iter_fort63_nc(file):
+			yield frame
+		return
+	with open_file(file,'r') as f:
+		header=read_output_header(f)
+		NP=header.NP
+		ncols=header.IRTYPE
+		values=np.empty((NP,ncols),dtype=np.float64)
+		eta=values[:,0] if ncols==1 else values
+
+		for n in range(0,header.NDSETSE):
+			line=f.readline()
+			if not line.strip():
+				#run stopped before writing all NDSETSE datasets
+				break
+			tmp=line.split()
+			time=float(tmp[0])
+			it=int(tmp[1])
+			read_dataset(f,tmp,values)
+			yield time,it,(eta.copy() if copy else eta)
+
+
+def iter_fort63_sparse(file,default=DRY):
+	"""
+	Streams the datasets of a fort.63 as compact pairs of the nodes that differ from default.
+
+	Parameters
+	----------
+	file : string
+		path of the fort.63 file (full or sparse)
+	default : float
+		value of the nodes left out (dry nodes by default)
+
+	Yields
+	------
+		4-tuple
+			(time in seconds, iteration, 0-based node indices, values of those nodes)
+	"""
+
+	with open_file(file,'r') as f:
+		header=read_output_header(f)
+		for n in range(0,header.NDSETSE):
+			tmp=f.readline().split()
+			if not tmp:
+				break
+			index,values=read_sparse_dataset(f,tmp,header.NP,header.IRTYPE,default)
+			yield float(tmp[0]),int(tmp[1]),index,values
+
+
+def write_output(file,header,frames,sparse=True,default=DRY):
+	"""
+	Writes an ADCIRC ASCII output file.
+
+	Parameters
+	----------
+	file : string
+		path of the output file
+	header : OutputHeader
+		header of the file (NDSETSE is set to the number of frames written)
+	frames : iterable
+		(time in seconds, iteration, values) datasets, values having NP rows; they are written one at a time,
+		so a generator such as iter_fort63 never has more than one dataset in memory
+	sparse : bool
+		if True, write the sparse format that only lists nodes whose value differs from default
+	default : float
+		default value of sparse datasets (dry nodes by default)
+
+	Returns
+	-------
+		int
+			number of datasets written
+	"""
+
+	with open(file,'w') as f:
+		f.write("%-32s %-24s %-24s\n" % (header.RUNDES,header.RUNID,header.AGRID))
+		#the number of datasets is only known at the end: header.NDSETSE is written first and patched if it differs
+		countOffset=f.tell()
+		f.write("%11d %11d %15.7E %11d %11d\n" % (header.NDSETSE,header.NP,header.DTDP,header.NSPOOLGE,header.IRTYPE))
+		count=0
+		for time,it,values in frames:
+			count+=1
+			values=np.asarray(values,dtype=np.float64).reshape(header.NP,-1)
+			if sparse:
+				index=np.flatnonzero((values!=default).any(axis=1))
+				f.write("%20.10E %11d %11d %20.10E\n" % (time,it,len(index),default))
+			else:
+				index=np.arange(header.NP)
+				f.write("%20.10E %11d\n" % (time,it))
+			table=np.column_stack([index+1,values[index]])
+			np.savetxt(f,table,fmt=['%10d']+['%20.10E']*values.shape[1])
+		if count!=header.NDSETSE:
+			f.seek(countOffset)
+			f.write("%11d" % count)
+	return count
+
+
+class Fort63Index:
+	"""
+	Byte offsets of the dataset headers of a fort.63, for random access to its timesteps.
+
+	The index is built with one sequential scan and persisted next to the file (<fort.63>.idx.npz).
+	It is reused by later runs as long as the size and modification time of the fort.63 are unchanged,
+	so a run still being written (growing file) is re-indexed automatically.
+	"""
+
+	def __init__(self,file,index_file=None,persist=True):
+		"""
+		Loads the persisted index of file, or builds (and persists) it.
+
+		Parameters
+		----------
+		file : string
+			path of the fort.63 file
+		index_file : string
+			path of the persisted index (defaults to <file>.idx.npz)
+		persist : bool
+			if False, never read or write the index file
+		"""
+
+		self.file=file
+		self.index_file=index_file if index_file is not None else file+".idx.npz"
+		if not (persist and self.load()):
+			self.build()
+			if persist:
+				try:
+					self.save()
+				except OSError as e:
+					print("could not write fort.63 index",self.index_file,e)
+
+	def __len__(self):
+		return len(self.offsets)
+
+	def build(self):
+		"""
+		Scans the fort.63 once and records the offset, time and iteration of every dataset.
+		"""
+
+		offsets=[]
+		times=[]
+		iterations=[]
+		with open_file(self.file,'rb') as f:
+			self.header=read_output_header(f)
+			NP=self.header.NP
+			for n in range(0,self.header.NDSETSE):
+				offset=f.tell()
+				tmp=f.readline().split()
+				if not tmp:
+					break
+				count=int(tmp[2]) if is_sparse(tmp) else NP
+				nodes=sum(1 for line in itertools.islice(f,count))
+				if nodes<count:
+					#last dataset is still being written
+					break
+				offsets.append(offset)
+				times.append(float(tmp[0]))
+				iterations.append(int(tmp[1]))
+
+		st=os.stat(self.file)
+		self.size=st.st_size
+		self.mtime=st.st_mtime
+		self.offsets=np.array(offsets,dtype=np.int64)
+		self.times=np.array(times,dtype=np.float64)
+		self.iterations=np.array(iterations,dtype=np.int64)
+
+	def save(self):
+		h=self.header
+		np.savez(self.index_file,offsets=self.offsets,times=self.times,iterations=self.iterations,
+			size=self.size,mtime=self.mtime,
+			header=np.array([h.RUNDES,h.RUNID,h.AGRID]),
+			dims=np.array([h.NDSETSE,h.NP,h.NSPOOLGE,h.IRTYPE]),DTDP=h.DTDP)
+
+	def load(self):
+		"""
+		Loads the persisted index if it still matches the fort.63.
+
+		Returns
+		-------
+			bool
+				True if the index was loaded
+		"""
+
+		try:
+			data=np.load(self.index_file)
+		except (OSError,ValueError):
+			return False
+		with data:
+			st=os.stat(self.file)
+			try:
+				if int(data['size'])!=st.st_size or float(data['mtime'])!=st.st_mtime:
+					return False
+				offsets,times,iterations=data['offsets'],data['times'],data['iterations']
+				RUNDES,RUNID,AGRID=[str(i) for i in data['header']]
+				NDSETSE,NP,NSPOOLGE,IRTYPE=[int(i) for i in data['dims']]
+				DTDP=float(data['DTDP'])
+			except (KeyError,ValueError,TypeError):
+				#written by another version or edited by hand: rebuilt by the caller
+				return False
+			self.size=st.st_size
+			self.mtime=st.st_mtime
+			self.offsets=offsets
+			self.times=times
+			self.iterations=iterations
+			self.header=OutputHeader(RUNDES,RUNID,AGRID,NDSETSE,NP,DTDP,NSPOOLGE,IRTYPE)
+		return True
+
+	def find(self,seconds):
+		"""
+		Gets the timestep whose time is nearest to a given time.
+
+		Parameters
+		----------
+		seconds : float
+			time since the start of the run (e.g. 36*3600 for hour 36)
+
+		Returns
+		-------
+			int
+				index of the nearest timestep
+		"""
+
+		if len(self)==0:
+			raise IndexError("fort.63 has no complete timestep")
+		n=int(np.searchsorted(self.times,seconds))
+		if n==len(self) or (n>0 and seconds-self.times[n-1]<=self.times[n]-seconds):
+			n-=1
+		return n
+
+	def read(self,n):
+		"""
+		Reads a single timestep.
+
+		Parameters
+		----------
+		n : int
+			index of the timestep (negative values count from the end)
+
+		Returns
+		-------
+			3-tuple
+				(time in seconds, iteration, elevations) as yielded by iter_fort63
+		"""
+
+		for frame in self.iter_range(n,None if n==-1 else n+1,copy=True):
+			return frame
+		raise IndexError("timestep %d out of range" % n)
+
+	def read_time(self,seconds):
+		"""
+		Reads the timestep nearest to a given time (see find).
+		"""
+
+		return self.read(self.find(seconds))
+
+	def iter_range(self,start=None,stop=None,step=None,copy=False):
+		"""
+		Streams a range of timesteps, seeking directly to each one.
+
+		Parameters
+		----------
+		start,stop,step : int
+			slice of the timesteps to read
+		copy : bool
+			see iter_fort63
+
+		Yields
+		------
+			3-tuple
+				(time in seconds, iteration, elevations) as yielded by iter_fort63
+		"""
+
+		NP=self.header.NP
+		ncols=self.header.IRTYPE
+		values=np.empty((NP,ncols),dtype=np.float64)
+		eta=values[:,0] if ncols==1 else values
+
+		f=open_file(self.file,'rb')
+		try:
+			for n in range(*slice(start,stop,step).indices(len(self))):
+				offset=int(self.offsets[n])
+				if not f.seekable() and f.tell()>offset:
+					#compressed stream: restart from the beginning to go back
+					f.close()
+					f=open_file(self.file,'rb')
+				skip_to(f,offset)
+				read_dataset(f,f.readline().split(),values)
+				yield float(self.times[n]),int(self.iterations[n]),(eta.copy() if copy else eta)
+		finally:
+			f.close()
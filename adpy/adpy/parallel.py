@@ -0,0 +1,199 @@
+import os
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor
+from .mesh import Mesh,read_mesh
+from .compress import compression
+from .output import read_output_header,read_maxele,is_sparse
+from .netcdf import is_netcdf,read_maxele_nc
+
+BLOCKSIZE=1<<24
+
+
+def find_line_offsets(f,start,counts):
+	"""
+	Finds the byte offsets that follow given numbers of lines.
+
+	Parameters
+	----------
+	f : file object
+		file opened in binary mode
+	start : int
+		byte offset of the first line to count
+	counts : list
+		numbers of lines of consecutive sections (e.g. [NP,NE])
+
+	Returns
+	-------
+		list
+			byte offset of the end of each section
+	"""
+
+	ends=[]
+	targets=np.cumsum(counts)
+	seen=0
+	offset=start
+	f.seek(start)
+	while len(ends)<len(targets):
+		block=f.read(BLOCKSIZE)
+		if not block:
+			if len(ends)==len(targets)-1 and seen==targets[-1]-1 and offset>start:
+				#last line without a trailing newline
+				ends.append(offset)
+				break
+			raise ValueError("file ends before the expected %d lines" % targets[-1])
+		newlines=np.flatnonzero(np.frombuffer(block,dtype=np.uint8)==10)
+		while len(ends)<len(targets) and targets[len(ends)]<=seen+len(newlines):
+			ends.append(offset+int(newlines[targets[len(ends)]-seen-1])+1)
+		seen+=len(newlines)
+		offset+=len(block)
+	return ends
+
+
+def split_range(f,start,end,parts):
+	"""
+	Splits the byte range [start,end) of a file into at most parts ranges ending at line boundaries.
+
+	Returns
+	-------
+		list
+			list of (start,end) byte ranges
+	"""
+
+	bounds=[start]
+	for i in range(1,parts):
+		f.seek(start+(end-start)*i//parts)
+		f.readline()
+		bounds.append(min(max(f.tell(),bounds[-1]),end))
+	bounds.append(end)
+	return [(bounds[i],bounds[i+1]) for i in range(0,parts) if bounds[i]<bounds[i+1]]
+
+
+def parse_range(args):
+	"""
+	Parses the lines within a byte range of a file into a 2-d array (runs in a worker process).
+	"""
+
+	file,start,end,ncols,columns,dtype=args
+	with open(file,'rb') as f:
+		f.seek(start)
+		values=f.read(end-start).decode('ascii').split()
+	if len(values)%ncols:
+		raise ValueError("byte range %d-%d of %s does not hold whole rows of %d columns" % (start,end,file,ncols))
+	if np.dtype(dtype).kind=='f':
+		table=np.array(values,dtype=np.float64).reshape(-1,ncols)
+	else:
+		table=np.array(values,dtype=np.int64).reshape(-1,ncols)
+	return table[:,columns].astype(dtype)
+
+
+def parse_sections(file,sections,workers):
+	"""
+	Parses sections of a file in a process pool.
+
+	Parameters
+	----------
+	file : string
+		path of the file
+	sections : list
+		list of (start,end,nrows,ncols,columns,dtype) describing each table
+	workers : int
+		number of worker processes
+
+	Returns
+	-------
+		list
+			one array per section, holding the given columns of its nrows rows
+	"""
+
+	jobs=[]
+	with open(file,'rb') as f:
+		for start,end,nrows,ncols,columns,dtype in sections:
+			ranges=split_range(f,start,end,workers)
+			jobs.append([(file,a,b,ncols,columns,dtype) for a,b in ranges])
+
+	tables=[]
+	with ProcessPoolExecutor(max_workers=workers) as pool:
+		results=[list(pool.map(parse_range,job)) for job in jobs]
+	for (start,end,nrows,ncols,columns,dtype),parts in zip(sections,results):
+		table=np.concatenate(parts) if parts else np.empty((0,len(columns)),dtype=dtype)
+		if len(table)!=nrows:
+			raise ValueError("expected %d rows, got %d" % (nrows,len(table)))
+		tables.append(table)
+	return tables
+
+
+def read_mesh_parallel(file,workers=None):
+	"""
+	Reads a fort.14 like read_mesh, parsing the node and element tables in a process pool.
+	The node and element sections are split into byte ranges at line boundaries; the result is
+	identical to read_mesh.
+
+	Parameters
+	----------
+	file : string
+		path of the fort.14 file
+	workers : int
+		number of worker processes (defaults to the number of CPUs)
+
+	Returns
+	-------
+		Mesh
+	"""
+
+	if compression(file):
+		#byte ranges of a compressed stream cannot be parsed independently
+		return read_mesh(file)
+	workers=workers or os.cpu_count() or 1
+	with open(file,'rb') as f:
+		AGRID=f.readline().decode('ascii').rstrip('\r\n')
+		tmp=f.readline().split()
+		NE=int(tmp[0])
+		NP=int(tmp[1])
+		start=f.tell()
+		nodesEnd,elementsEnd=find_line_offsets(f,start,[NP,NE])
+
+	nodes,triangles=parse_sections(file,[
+		(start,nodesEnd,NP,4,[1,2,3],np.float64),
+		(nodesEnd,elementsEnd,NE,5,[2,3,4],np.int32)],workers)
+	return Mesh(AGRID,
+		np.ascontiguousarray(nodes[:,0]),
+		np.ascontiguousarray(nodes[:,1]),
+		np.ascontiguousarray(nodes[:,2]),
+		triangles-1)
+
+
+def read_maxele_parallel(file,workers=None):
+	"""
+	Reads a maxele.63 like read_maxele, parsing the node values in a process pool.
+
+	Parameters
+	----------
+	file : string
+		path of the maxele.63 file
+	workers : int
+		number of worker processes (defaults to the number of CPUs)
+
+	Returns
+	-------
+		4-tuple
+			(OutputHeader, time in seconds, iteration, elevations as a float64 array of length NP)
+	"""
+
+	if is_netcdf(file):
+		return read_maxele_nc(file)
+	if compression(file):
+		return read_maxele(file)
+	workers=workers or os.cpu_count() or 1
+	with open(file,'rb') as f:
+		header=read_output_header(f)
+		tmp=f.readline().split()
+		if is_sparse(tmp):
+			#only the wet nodes are listed, the serial reader is fast enough
+			return read_maxele(file)
+		time=float(tmp[0])
+		it=int(tmp[1])
+		start=f.tell()
+		end,=find_line_offsets(f,start,[header.NP])
+
+	values,=parse_sections(file,[(start,end,header.NP,2,[1],np.float64)],workers)
+	return header,time,it,np.ascontiguousarray(values[:,0])
@@ -0,0 +1,128 @@
+from .compress import open_file
+from .output import read_output_header
+from .netcdf import is_netcdf,open_dataset,read_netcdf_header
+
+
+class Probe:
+	"""
+	Metadata of a set of ADCIRC files, read from their headers only.
+
+	Attributes are None for files that were not probed:
+	AGRID, NE and NP from the fort.14; RUNDES and RUNID from the fort.15; NDSETSE, NP63 and RUNID63
+	from the fort.63; NPmaxele and RUNIDmaxele from the maxele.63.
+	mismatches lists the inconsistencies found between the files (e.g. different NP).
+	"""
+
+	FIELDS=['AGRID','NE','NP','RUNDES','RUNID','NDSETSE','NP63','RUNID63','NPmaxele','RUNIDmaxele']
+
+	def __init__(self):
+		for field in self.FIELDS:
+			setattr(self,field,None)
+		self.mismatches=[]
+
+	@property
+	def ok(self):
+		return self.mismatches==[]
+
+	def as_dict(self):
+		record=dict((field,getattr(self,field)) for field in self.FIELDS)
+		record['mismatches']=list(self.mismatches)
+		return record
+
+	def __repr__(self):
+		return "Probe(%s)" % ", ".join("%s=%r" % (field,getattr(self,field)) for field in self.FIELDS if getattr(self,field) is not None)
+
+
+def probe_fort14(file):
+	"""
+	Reads the grid name and sizes of a fort.14.
+
+	Returns
+	-------
+		3-tuple
+			(AGRID,NE,NP)
+	"""
+
+	with open_file(file,'r') as f:
+		AGRID=f.readline().rstrip('\r\n')
+		tmp=f.readline().split()
+	return AGRID,int(tmp[0]),int(tmp[1])
+
+
+def probe_fort15(file):
+	"""
+	Reads the run description and identification of a fort.15.
+
+	Returns
+	-------
+		2-tuple
+			(RUNDES,RUNID)
+	"""
+
+	with open_file(file,'r') as f:
+		RUNDES=f.readline().split('!')[0].strip()
+		RUNID=f.readline().split('!')[0].strip()
+	return RUNDES,RUNID
+
+
+def probe_output(file):
+	"""
+	Reads the header of an ADCIRC output file (fort.63, maxele.63, ASCII or netCDF).
+
+	Returns
+	-------
+		OutputHeader
+	"""
+
+	if is_netcdf(file):
+		with open_dataset(file) as ds:
+			NDSETSE=len(ds.dimensions['time']) if 'time' in ds.dimensions else 1
+			return read_netcdf_header(ds,NDSETSE)
+	with open_file(file,'r') as f:
+		return read_output_header(f)
+
+
+def probe(fort14=None,fort15=None,fort63=None,maxele63=None,strict=False):
+	"""
+	Reads only the headers of the given ADCIRC files and checks that they describe the same grid.
+
+	Parameters
+	----------
+	fort14 : string
+		path of the fort.14 file
+	fort15 : string
+		path of the fort.15 file
+	fort63 : string
+		path of the fort.63 file
+	maxele63 : string
+		path of the maxele.63 file
+	strict : bool
+		if True, raise ValueError when the files disagree
+
+	Returns
+	-------
+		Probe
+	"""
+
+	record=Probe()
+	if fort14 is not None:
+		record.AGRID,record.NE,record.NP=probe_fort14(fort14)
+	if fort15 is not None:
+		record.RUNDES,record.RUNID=probe_fort15(fort15)
+	if fort63 is not None:
+		header=probe_output(fort63)
+		record.NDSETSE,record.NP63,record.RUNID63=header.NDSETSE,header.NP,header.RUNID
+	if maxele63 is not None:
+		header=probe_output(maxele63)
+		record.NPmaxele,record.RUNIDmaxele=header.NP,header.RUNID
+
+	if record.NP is not None:
+		for name,NP in [('fort.63',record.NP63),('maxele.63',record.NPmaxele)]:
+			if NP is not None and NP!=record.NP:
+				record.mismatches.append("%s has %d nodes, fort.14 has %d" % (name,NP,record.NP))
+	elif record.NP63 is not None and record.NPmaxele is not None and record.NP63!=record.NPmaxele:
+		record.mismatches.append("fort.63 has %d nodes, maxele.63 has %d" % (record.NP63,record.NPmaxele))
+
+	if strict and not record.ok:
+		raise ValueError("; ".join(record.mismatches))
+	return record
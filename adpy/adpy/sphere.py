@@ -0,0 +1,25 @@
+import numpy as np
+
+#WGS-84 ellipsoid, as used by geopy.distance.distance
+WGS84_A=6378137.0
+WGS84_F=1/298.257223563
+WGS84_B=WGS84_A*(1-WGS84_F)
+#mean earth radius (2a+b)/3, used for distances between longitude/latitude points on a sphere
+EARTH_RADIUS=(2*WGS84_A+WGS84_B)/3
+
+
+def unit_vectors(lon,lat):
+	"""
+	Converts longitudes and latitudes (degrees) to 3-d points on the unit sphere, so that nearest
+	neighbor and radius queries can be run on a KD-tree with chord lengths.
+	"""
+
+	lam=np.radians(np.asarray(lon,dtype=np.float64))
+	phi=np.radians(np.asarray(lat,dtype=np.float64))
+	cosPhi=np.cos(phi)
+	return np.column_stack([cosPhi*np.cos(lam),cosPhi*np.sin(lam),np.sin(phi)])
+
+
+def chord_to_distance(chord):
+	#great-circle distance in meters of a chord of the unit sphere
+	return 2*EARTH_RADIUS*np.arcsin(np.clip(chord/2,0,1))
@@ -5,4 +5,6 @@ setup(name='adpy',
       description='reads and parse adcirc files',
       author='Gerry Agluba',
       packages=['adpy'],
+      install_requires=['numpy'],
+      extras_require={'netcdf':['netCDF4'],'zstd':['zstandard'],'coast':['scipy']},
       zip_safe=False)
\ No newline at end of file
@@ -0,0 +1,30 @@
+import os
+import numpy as np
+import pytest
+from adpy.mesh import read_mesh
+from adpy.coast import is_coastline,coastline_nodes,coastline_edges,distance_to_coast
+
+#fort.14 of the maxkmlgenerator package, whose land boundaries are all external barriers (IBTYPE 23)
+FORT_2_14=os.path.join(os.path.dirname(__file__),'..','..','maxkmlgenerator','fort_2.14')
+
+
+def test_is_coastline():
+	for IBTYPE in (0,1,3,10,11,13,20,21,23):
+		assert is_coastline(IBTYPE)
+	for IBTYPE in (2,4,5,12,22,24,25):
+		assert not is_coastline(IBTYPE)
+
+
+def test_external_barriers_are_coastline():
+	mesh=read_mesh(FORT_2_14,boundaries=True)
+	assert set(IBTYPE for IBTYPE,nodes in mesh.boundaries.landSegments)=={23}
+
+	nodes=coastline_nodes(mesh.boundaries)
+	assert len(nodes)>0
+	assert len(coastline_edges(mesh.boundaries))>0
+
+	pytest.importorskip('scipy')
+	distance=distance_to_coast(mesh.x,mesh.y,mesh.boundaries)
+	assert np.isfinite(distance).all()
+	assert (distance[nodes]==0).all()
+	assert distance.max()>0
@@ -3,8 +3,9 @@
 import sys
 sys.path.append(r"C:\Users\adminalpha\Desktop\UPStuff\Acads\1920A\ThesisRelated\StormSurge2019\Modules\maxkmlgenerator\maxkmlgenerator")
 import shapefile
-import matplotlib.path as mpltPath
+import numpy as np
 from adpy import*
+from surgewarnings.polygons import Polygon
 
 class MaxKmlGenerator():
 	"""
@@ -56,17 +57,12 @@ class MaxKmlGenerator():
 		return [field[0] for field in fields]
 
 	def filterNodes(self,parts,geom,X,Y,paths,insides):
-		for i in range(0,len(parts)):
-			if(i < len(parts) - 1):
-				path = mpltPath.Path(geom[parts[i]:parts[i+1]])
-				inside=path.contains_points([(X[j],Y[j]) for j in range(1,len(X))])
-				paths.append(path)
-				insides.append(inside)
-			else:
-				path = mpltPath.Path(geom[parts[i]:len(geom)])
-				inside=path.contains_points([(X[j],Y[j]) for j in range(1,len(X))])
-				paths.append(path)
-				insides.append(inside)
+		#one mask for the whole shape, so nodes in a hole (an enclave of another province) are left out,
+		#the same as surgewarnings' MaxKmlGenerator
+		polygon=Polygon(geom,parts)
+		inside=polygon.contains(np.column_stack([np.asarray(X[1:],dtype=np.float64),np.asarray(Y[1:],dtype=np.float64)]))
+		paths.extend(polygon.rings)
+		insides.append(inside)
 
 	def writeToKml(self):
 		AGRID,NE,NP,X,Y,DP,NM = read_fort14(self.fort14)
@@ -5,4 +5,5 @@ setup(name='maxkmlgenerator',
       description='provides a module for kml generation',
       author='Gerry Agluba',
       packages=['maxkmlgenerator'],
+      install_requires=['numpy','matplotlib','pyshp','surgewarnings'],
       zip_safe=False)
\ No newline at end of file
@@ -1,22 +1,104 @@
+import os
 import sys
 import datetime
 import shapefile
 import numpy as np
-import matplotlib.path as mpltPath
 from scipy.spatial import distance
-from geopy.distance import distance as gdist
 from adpy import*
+from .spatial import NodeIndex
+from .crosswalk import load_crosswalk
+from .labels import BarangayIndex,select_provinces,record_provinces
+from .neighbors import write_neighbor_files
+from .shoreline import SHORELINE_DISTANCE,ShorelineBuffer,coastline_segments,nodes_near_outline
+from .polygons import prepared_polygon
+from .parallel import evaluate_towns
 
 
 
 
+class WarningInputs:
+	"""
+	The inputs of Warnings that do not depend on the province: the three shapefiles, the fort.14 and the maxele.63.
+	They are read once and can be shared by the Warnings of several provinces (see WarningsBatch), together
+	with the node labels, the node KD-tree and the barangay index built from them.
+
+	"""
+
+	def __init__(self,shape_file,shape2_file,shape3_file,fort_14,maxelev63):
+		"""
+		Parameters
+		----------
+		shape_file : .shp file
+			.shp file for towns/municipalities/cities.
+		shape2_file : .shp file
+			.shp file for barangays.
+		shape3_file : .shp file
+			.shp file for provinces.
+		fort_14 : fort.14 file
+			mesh of the run
+		maxelev63: maxele.63 file
+			maximum elevations at the nodes of fort_14
+		"""
+
+		self.shape_file=shape_file
+		self.shape2_file=shape2_file
+		self.fort_14=fort_14
+
+		print("parsing files",datetime.datetime.now())
+		self.sf =  shapefile.Reader(shape_file)
+		self.sf2 =  shapefile.Reader(shape2_file)
+		self.sf3 =  shapefile.Reader(shape3_file)
+		#only the node coordinates are read here, depths and elements are read if something asks for them
+		self.mesh = LazyMesh(fort_14)
+		self.header,time,self.NDSETSE,self.maxele = read_maxele(maxelev63)
+		self.labels = None
+		self.nodeIndex = None
+		self.barangayIndex = None
+
+	def getLabels(self,provinces=None):
+		"""
+		Gets the town, province and barangay of every mesh node.
+		The whole mesh is labeled once with the polygons of all the provinces, through the crosswalk cache
+		(see crosswalk.load_crosswalk), and the labels of some provinces are derived from it (see
+		labels.select_provinces), so a batch of provinces costs one labeling and one cache file.
+
+		Parameters
+		----------
+		provinces : list
+			provinces (NAME_1) whose polygons are used; all if None
+
+		Returns
+		-------
+			labels.NodeLabels
+				labels of all the mesh nodes, the same as labels.label_nodes with these provinces
+		"""
+
+		if self.labels is None:
+			self.labels = load_crosswalk(self.mesh,self.sf,self.sf2,self.fort_14,self.shape_file,self.shape2_file)
+		if provinces is None:
+			return self.labels
+		return select_provinces(self.labels,self.mesh.x,self.mesh.y,self.sf,self.sf2,provinces)
+
+	def getNodeIndex(self):
+		#KD-tree over the wet nodes, built on first use
+		if self.nodeIndex is None:
+			self.nodeIndex = NodeIndex(self.mesh.x,self.mesh.y,np.flatnonzero(self.maxele != -99999))
+		return self.nodeIndex
+
+	def getBarangayIndex(self):
+		#barangays grouped by town, built on first use
+		if self.barangayIndex is None:
+			self.barangayIndex = BarangayIndex(self.sf2)
+		return self.barangayIndex
+
+
 class Warnings:
 	"""
 	Responsible for creating storm surge warnings and notification up to the town level of a given province.
 
 	"""
 
-	def __init__(self,shape_file,shape2_file,shape3_file,filt,fort_14,fort_15,maxelev63,fort_63,radiusOffset,neighborFilesDir):
+	def __init__(self,shape_file,shape2_file,shape3_file,filt,fort_14,fort_15,maxelev63,fort_63,radiusOffset,neighborFilesDir,inputs=None):
 		"""
 		Warnings Initialization.
 		Initialized given arguments and performs preliminary procedures before warning generations.
@@ -45,6 +127,8 @@ class Warnings:
 		neighborFilesDir : string(directory path)
 			This path is needed the .neighbors file to be used for town notifications.
 			.neighbor files are files that provides the neighbors of a town in  a particular province(filt)
+		inputs : WarningInputs
+			shapefiles, fort_14 and maxelev63 already read (e.g. for another province); read here if None
 		"""
 
 
@@ -59,59 +143,44 @@ class Warnings:
 		self.radiusOffset=radiusOffset
 		self.neighborFilesDir=neighborFilesDir
 
-		print("parsing files",datetime.datetime.now())
-		self.sf =  shapefile.Reader(self.shape_file)
-		self.sf2 =  shapefile.Reader(self.shape2_file)
-		self.sf3 =  shapefile.Reader(self.shape3_file)
-		self.AGRID,self.NE,self.NP,self.X,self.Y,self.DP,self.NM = read_fort14(self.fort_14)
-		self.RUNDES,self.RUNID,self.AGRID,self.NDSETSE,self.ETA = read_maxelev63(self.maxelev63)
+		if inputs is None:
+			inputs = WarningInputs(shape_file,shape2_file,shape3_file,fort_14,maxelev63)
+		self.inputs = inputs
+		self.sf,self.sf2,self.sf3 = inputs.sf,inputs.sf2,inputs.sf3
+		self.mesh = inputs.mesh
+		self.AGRID,self.NE,self.NP = self.mesh.AGRID,self.mesh.NE,self.mesh.NP
+		self.NDSETSE,self.maxele = inputs.NDSETSE,inputs.maxele
+		self.RUNDES,self.RUNID,self.AGRID = inputs.header.RUNDES,inputs.header.RUNID,inputs.header.AGRID
+
+		#town/province/barangay of every wet node, see labelNodes
+		self.labels = None
+		#town record index -> 0-based indices of its wet nodes, set by generateWarnings
+		self.townNodes = None
+		#record id of self.filt in self.shape3_file, found on first use
+		self.provinceIndex = None
 
 		#list that will contain warnings and notifications and early surges
 		self.warnings=[]
 		self.notifications=[]
 		self.earliestSurges=[]
+		#(town,maximum elevation near its coast) of the towns without nodes inside
+		self.shorelineWarnings=[]
 
 
 	def __str__(self):
 		return "Warnings and notifications for " + self.filt + "\n"
 
-	
-	def getCenter(self,arr):
-		"""
-		Gets the center of a list of points.
-
-		Parameters
-		----------
-		arr : list
-			list of points
+	@property
+	def DP(self):
+		#bathymetric depths, 1-based like the lists of read_fort14
+		return ['DP']+self.mesh.depth.tolist()
 
-		Returns
-		-------
-			2-tuple
-				returns the center of all points in arr
-		"""
-
-		return (sum([i[0] for i in arr])/len(arr),sum([i[1] for i in arr])/len(arr))
-
-	def findMaxDist(self,a,arr):
-		"""
-		Gets the distance of the farthest point from the center of a list of points.
-		findMaxDist helps in optimizing the search process in determining the points that are inside a polygon.
+	@property
+	def NM(self):
+		#element connectivity, 1-based like the lists of read_fort14
+		return [['NM(JE,1)','NM(JE,2)','NM(JE,3)']]+(self.mesh.triangles+1).tolist()
 
-		Parameters
-		----------
-		a : 2-tuple
-			center of all the points in arr
-		arr: list
-			list of points
 	
-		Returns
-		-------
-			float
-				returns the distance of the farthest point included in arr relative to a
-		"""
-		return max([gdist(a,i).meters for i in arr])	
-
 	'''def getDirection(self,pointA,pointB):
 		#gets the direction of pointB relative to point A
 		#not sure if this function is still needed
@@ -153,70 +222,118 @@ class Warnings:
 		field_names = [field[0] for field in fields]
 		return field_names
 
-	def findCandidatePoints(self,center,maxDist,candidatePoints,candidatePoints_index):
+	def getNodeIndex(self):
+		#KD-tree over the wet nodes, built on first use and shared through self.inputs
+		return self.inputs.getNodeIndex()
+
+	def labelNodes(self):
+		"""
+		Labels every wet node of self.fort_14 with the town, province and barangay of self.filt that contains it.
+		Each shapefile is matched against all the nodes in one pass: the polygons are indexed by bounding box
+		and only the nodes inside a bounding box are tested against the polygon itself. A node inside
+		several towns goes to the first one in self.shape_file, like when towns claim their nodes one by one.
+		The labels of all the nodes only depend on the mesh and the shapefiles, so they are cached on disk
+		(see crosswalk.Crosswalk) and later runs on the same inputs skip the point-in-polygon tests. The
+		cached labels cover all the provinces and are shared with the other provinces through self.inputs
+		(see WarningInputs.getLabels).
+
+		Returns
+		-------
+			labels.NodeLabels
+				town and barangay record indices (-1 for none) of every mesh node
 		"""
-		Finds all the points that is within a specific range relative to a certain point.
-		It measures all the distances of each the points in self.fort_14 and appended it to a list.
-		if its less than or equal to a certain distance. Index of appeded points is also appended to another list.
-		This function filters all the points that could be included in the generation of warnings and thus minimized
-		the search area later on for determining if certain points are inside a polygon.
+		if self.labels is None:
+			self.labels = self.inputs.getLabels([self.filt]).restrict(np.flatnonzero(self.maxele != -99999))
+		return self.labels
+
+	def isClaimedBefore(self,nodes,townIndex):
+		"""
+		Checks which nodes are already claimed when a town gets its turn. The towns claim their nodes in
+		the order of self.shape_file, and the nodes of a town are the ones labeled with it (see labelNodes),
+		so a node is claimed if it is labeled with an earlier town. This only depends on the labels, not on
+		the towns evaluated so far, so towns can be evaluated in any order (see evaluateTown).
 
 		Parameters
 		----------
-		center : 2-tuple
-			the reference point in which to measure the distance to all the points in (self.X,self.Y)
-		maxDist : float
-			the maximum distance from a point in self.X,self.Y to center to be included in candidatePoints
-		candidatePoints: list
-			stores all the included points
-		candidatePoints_index : list
-			stores all the indexes of all the included points in candidatePoints
-	
+		nodes : numpy.ndarray
+			0-based mesh node indices
+		townIndex : int
+			record id of the town in self.shape_file
+
 		Returns
 		-------
-			(results are returned in candidatePoints and candidatePoints_index)
+			numpy.ndarray
+				boolean mask, True for the claimed nodes
 		"""
-		for i in range(1,len(self.X)):
-			if gdist(center,(self.X[i],self.Y[i])).meters < maxDist + self.radiusOffset:
-				if(self.ETA[i]) != -99999:
-					candidatePoints.append((self.X[i],self.Y[i]))
-					candidatePoints_index.append(i)		
 
-	def updateWarnings(self,pointIndexInsideGeom,town_name):
+		town=self.labelNodes().town[nodes]
+		return (town>=0) & (town<townIndex)
+
+	def getTownWarning(self,pointIndexInsideGeom,town_name):
 
 		"""
-		Adds a town,its maximum predicted water elevation measure and its barangay of origin to self.warnings.
+		Gets the warning of a town: its maximum predicted water elevation measure and its barangay of origin.
 		Given all the points inside a given town, it finds the maximum water elevation measure among this points.
-		It gets the coordinate of the founded maximum water elevation measure. All points inside a given town are then 
-		removed from self.X,self.Y (to minimized search areas for next iterations). WIth the founded coordinates,
-		it will find which barangay the coordinates are in. The town name , the maximum water elevation measure and
-		its barangay of origin are now then included in the list of warnings.
+		It gets the coordinate of the founded maximum water elevation measure. WIth the founded coordinates,
+		it will find which barangay the coordinates are in.
+		Only the k nodes of the town are touched, the node arrays themselves never change.
 
 		Parameters
 		----------
-		pointIndexInsideGeom : list
-			Index of all the points included in the polygon of town_name
+		pointIndexInsideGeom : array-like
+			0-based mesh node indices of the points labeled with town_name
 		town_name : string
 			name of the iven town
 	
 		Returns
 		-------
+			tuple
+				(town_name,maximum elevation,barangay of the maximum), or None if there are no points
 		"""
 
-		maxElev=max([self.ETA[i] for i in pointIndexInsideGeom])
-		maxElevIndex=self.ETA.index(maxElev)
-		xCoordOfMaxElev=self.X[maxElevIndex]
-		yCoordOfMaxElev=self.Y[maxElevIndex]
-
+		nodes=np.asarray(pointIndexInsideGeom,dtype=np.intp)
+		if len(nodes)==0:
+			return
+		maxElevIndex=nodes[np.argmax(self.maxele[nodes])]
+		maxElev=float(self.maxele[maxElevIndex])
+		xCoordOfMaxElev=float(self.mesh.x[maxElevIndex])
+		yCoordOfMaxElev=float(self.mesh.y[maxElevIndex])
 
-		for i in pointIndexInsideGeom:
-			self.X[i]=self.Y[i]=self.ETA[i]="rem"
-		self.X=list(filter(lambda a: a != "rem", self.X))
-		self.Y=list(filter(lambda a: a != "rem", self.Y))
-		self.ETA=list(filter(lambda a: a != "rem", self.ETA))
 		barangayOfHighestSurge=self.getBarangayOfHighestSurge(town_name,xCoordOfMaxElev,yCoordOfMaxElev)
-		self.warnings.append((town_name,maxElev,barangayOfHighestSurge))
-		#print(barangay_name,maxElev)
+		return (town_name,maxElev,barangayOfHighestSurge)
+
+	def evaluateTown(self,townIndex,town_name):
+		"""
+		Evaluates one town of self.filt, without changing self:
+			Case 1. There are nodes labeled with the town
+				Find the maximum elevation of all its points (see getTownWarning). A node is labeled
+				with the first town that contains it, so no earlier town has claimed them.
+			Case 2. There are no nodes labeled with the town
+				Check the shoreline of the town for measurements that are within
+				SHORELINE_DISTANCE meters, and get the maximum of these measurements.
+		Needs self.townNodes (set by generateWarnings).
+
+		Parameters
+		----------
+		townIndex : int
+			record id of the town in self.shape_file
+		town_name : string
+			name of the town
+
+		Returns
+		-------
+			tuple
+				(warning,shorelineWarning), where warning is given by getTownWarning and shorelineWarning is
+				(town_name,maximum elevation near the coast); either or both can be None
+		"""
+
+		nodes=self.townNodes.get(townIndex)
+		if nodes is not None:
+			return self.getTownWarning(nodes,town_name),None
+		shorelineWarning=self.getShorelineWarning(townIndex)
+		if shorelineWarning is None:
+			return None,None
+		return None,(town_name,shorelineWarning)
 
 	def updateNotifications(self):
 		"""
@@ -264,6 +381,8 @@ class Warnings:
 		Create a neighbor file for a given province.
 			For two town;town A and town B, if there exist a point from its polygons that are the same, 
 			then townA is a neighbor of townB.
+		The shared points are found by sorting all the vertices of the province once (see neighbors.town_neighbors).
+		The files of all the provinces can be written at once with 'python -m surgewarnings neighbors'.
 		Neighbor are in the format:
 			<Town> [Neighboring Towns]*
 			....
@@ -278,64 +397,12 @@ class Warnings:
 		-------
 		"""
 
-		Province=self.filt
-		f=open(self.neighborFilesDir+Province+".neighbors",'w')
-
-
-		fields=self.sf.fields[1:]
-		field_names = [field[0] for field in fields]
-		for r in self.sf.shapeRecords():
-			x=x+1
-			atr=dict(zip(field_names,r.record))
-			if(atr['NAME_1'] == Province):
-				geom = r.shape.points
-				#parts = r.shape.parts
-				town = r.record[6]
-				set_geom = set(geom)
-				f.write(town)
-
-				for s in self.sf.shapeRecords():
-					atr2=dict(zip(field_names,s.record))
-					if(atr2['NAME_1'] == Province):
-						geom2 = s.shape.points
-						#parts = r.shape.parts
-						town2 = s.record[6]
-						set_geom2 = set(geom2)
-
-						#print(set_geom.intersection(set_geom2))
-						if set_geom.intersection(set_geom2) != set() and town!=town2:
-							#print(","+town2)
-							f.write(","+town2)
-
-				f.write("\n")
-		f.close()
-
-	def filterNodes(self,parts,geom,candidatePoints,paths,insides):
-		"""
-		Finds all the points in a given list of points that are inside a polygon.
-		For all closed paths. Filter all the points in candidatePoints that are inside that closed paths.
-		
-		Parameters
-		----------
-
-		Returns
-		-------
-
-		"""
-		for i in range(0,len(parts)):
-			if(i < len(parts) - 1):
-				path = mpltPath.Path(geom[parts[i]:parts[i+1]])		
-				inside=path.contains_points(candidatePoints)
-				paths.append(path)
-				insides.append(inside)
-			else:
-				path = mpltPath.Path(geom[parts[i]:len(geom)])		
-				inside=path.contains_points(candidatePoints)				
-				paths.append(path)
-				insides.append(inside)
+		write_neighbor_files(self.sf,self.neighborFilesDir,[self.filt])
 
 	def getBarangayOfHighestSurge(self,townFilter,xCoordOfMaxElev,yCoordOfMaxElev):
 		"""Finds the location of the highest surge in specific town.
+		   The barangays are grouped by town once (WarningInputs.getBarangayIndex), so a lookup only tests the barangays
+		   of townFilter whose bounding box contains the point.
 
 		Parameters
 		----------
@@ -353,184 +420,111 @@ class Warnings:
 				returns the barangay_name of the point (xCoordOfMaxElev.yCoordOfMaxElev) is located. 
 		"""
 
-		fields = self.sf.fields[1:] 
-		field_names = [field[0] for field in self.sf2.fields[1:]]
-		for r in self.sf2.shapeRecords():
-			atr = dict(zip(field_names,r.record))
-			if atr['NAME_2'] == townFilter: 
-
-				geom = r.shape.points
-				parts = r.shape.parts		
-
-				barangay_name = r.record[8]
-				paths=[]
-				insides=[]
-
-				self.filterNodes(parts,geom,[(xCoordOfMaxElev,yCoordOfMaxElev)],paths,insides)
-
-				compressedInsides=[]
-
-				for inside in insides:
-					if(any(inside)):
-						compressedInsides.append(True)
-					else:
-						compressedInsides.append(False)
+		return self.inputs.getBarangayIndex().find(townFilter,xCoordOfMaxElev,yCoordOfMaxElev)
 
-				if(any(compressedInsides)):
-					#print(barangay_name)
-					return 	barangay_name
-
-	def getShoreline(self,townGeom):
-		"""Finds the shoreline of a specific town. It finds all the list of points in a town's geometry that is beside bodies of water.
-		   This would be achieved by getting the intersection of points, between the town and the province.
-		   Note : 	This code works for provinces, beside the sea. This assumption would be reasonable because 
-		   			of the underlying physics of storm surge.
+	def getShorelineWarning(self,townIndex):
+		"""Finds the highest predicted water elevation within SHORELINE_DISTANCE meters of a town's coastline.
+		   The coastline is made of the edges of the town that are on the outline of the province (see
+		   shoreline.coastline_segments). It is densified (shoreline.ShorelineBuffer) and the wet nodes within
+		   SHORELINE_DISTANCE of its points are found with ball queries of the node KD-tree (getNodeIndex);
+		   the ones no town has claimed are measured. The town's coastline comes from the shapefiles, so the
+		   mesh coastline (LazyMesh.coastDistance) is not used to narrow the search: the two need not match.
 
 		Parameters
 		----------
-		townGeom : list
-			list of points that bounds a specific town.
+		townIndex : int
+			record id of the town in self.shape_file
 		Returns
 		-------
-			returns the shoreline of that town. To be specific, the set containing the intersection of thw town and the province geometry. 
+			float
+				the maximum elevation near the coast, or None if there is no coast or no measurement near it
 		"""
 
-		#gets the points that are include from the shorelines
-		field_names = self.extractFieldNames(self.sf3)
-
-		for r in self.sf3.shapeRecords():
-			atr = dict(zip(field_names,r.record))
-			if atr['NAME_1'] == self.filt: 
-				geom = r.shape.points
-				parts = r.shape.parts		
-				return list(set(geom).intersection(set(townGeom)))
-
-	def updateShorelineWarnings(self,shoreline,candidatePoints,candidatePoints_index):
-		"""Finds the best and most accurate predicted water elevation measure within 1 km of a town's  shoreline.
-		   It works as follow:
-				For each candidate point, if there exist a point in shoreline such that the distance
-				between the candidate point and that point is the shoreline is within 1000 meters, 
-				append the water eleveation of that candidae point to the list of water elevation near shoreline.
-				Find the maximum value of the list and return.
+		provinceIndex = self.getProvinceIndex()
+		if provinceIndex < 0:
+			return
 
-		Parameters
-		----------
-		shoreline : list
-			list of points correspoinding to the shoreline of a specific town.
-		candidatePoints : list
-			list of points which a specific town that is a potential water elevation near shoreline warning.
-		candidatePoints_index: list
-			list of integers that will be used to access the water elevation measurement of a certain point in candidatePoints.
-		Returns
-		-------
-			This function returns the maximum elevation in a list of potential water elevation near shoreline warnings.
-		"""
-		waterElevNearShoreline=[]
-		for i in range(1,len(candidatePoints)):
-			for j in shoreline:
-				if gdist(candidatePoints[i],j).meters < 1000:
-					waterElevNearShoreline.append(self.ETA[candidatePoints_index[i]])
-					break
-		try:
-			return max(waterElevNearShoreline)
-		except ValueError:
+		segments = coastline_segments(prepared_polygon(self.sf,townIndex),prepared_polygon(self.sf3,provinceIndex))
+		shoreline = ShorelineBuffer(segments)
+		nodes = shoreline.query(self.getNodeIndex(),SHORELINE_DISTANCE)
+		nodes = nodes[~self.isClaimedBefore(nodes,townIndex)]
+		if len(nodes) == 0:
 			return
+		return float(self.maxele[nodes].max())
+
+	def getProvinceIndex(self):
+		#record id of self.filt in self.shape3_file (-1 if it is not there), found on first use
+		if self.provinceIndex is None:
+			field_names = self.extractFieldNames(self.sf3)
+			self.provinceIndex = -1
+			for i,record in enumerate(self.sf3.records()):
+				if dict(zip(field_names,record))['NAME_1'] == self.filt:
+					self.provinceIndex = i
+					break
+		return self.provinceIndex
 
-	def generateWarnings(self):
+	def generateWarnings(self,workers=1):
 		"""Generates and provides warnings/notifications to affected areas/towns of a certain province.
 		   This function consolidates all the warnings,notifications and shoreline warnings and
 		   serves as a main umbrella functions for the different methods in this class.
 		   The function work as follow:
-		   		For each town, it will search for all candidatePoints for warnings,notifications etc. 
-		   		If there are candidatePoints, it filters the nodes, and finds if there are points inside 
-		   		the towns geometry. If there are points inside geomtry, it updates the warnings and notifications array.
-		   		If there are no points inside the town's geomtetry, then it will update warnings for the shoreline.
-		   		If there are no candidatePoints, do nothing.
+		   		All the wet nodes are labeled with the town that contains them (see labelNodes).
+		   		Then for each town, the nodes labeled with it are its points inside the town's geometry.
+		   		If there are points inside geomtry, it updates the warnings and notifications array.
+		   		If there are no points inside the town, then it will update warnings for the shoreline.
+		   The towns are evaluated independently (see evaluateTown), in a pool of worker processes if
+		   workers>1, and the results are merged in the order of self.shape_file, so the warnings are the
+		   same whatever the number of workers.
 
 
 		Parameters
 		----------
+		workers : int
+			number of worker processes evaluating the towns, all the cores if None (see parallel.evaluate_towns)
 		Returns
 		-------
 		"""
 		print("generating warning/notifications",datetime.datetime.now())
 		field_names = self.extractFieldNames(self.sf)
+		self.townNodes = self.labelNodes().townNodes()
 				
 		#	generate warnings for each towns...
 		nTowns=0
 		nShapes=0
 		nPoints=0
-		for r in self.sf.shapeRecords():
+		tasks=[]
+		for townIndex,record in enumerate(self.sf.records()):
 			#	extract information from .shp file
-			atr = dict(zip(field_names,r.record))
+			atr = dict(zip(field_names,record))
 
 			#	filter shape file with command line argument "filt" (provincial filter na to)
 			if atr['NAME_1'] == self.filt: 
 
 
-				geom = r.shape.points
-				parts = r.shape.parts		
+				town = prepared_polygon(self.sf,townIndex)
+				geom = town.points
 
 				nTowns+=1
-				nShapes+=(len(parts)-1)
+				nShapes+=(len(town.rings)-1)
 				nPoints+=len(geom)
 
-				#	find the center of the town and the farthest distance of the vertex of the polygon 
-				#	describing the town
-				town_name = r.record[6]
-				print(town_name)
-				center=self.getCenter(geom)
-				maxDist=self.findMaxDist(center,geom)
-
-				#initialized array for paths,insides,candidatePoints,candidatePoints_index,pointIndexInsideGeom
-				paths =[]
-				insides=[]
-				candidatePoints=[]
-				candidatePoints_index=[]
-				pointIndexInsideGeom=[]
-
-
-				'''iterate over all fort.14 nodes and take note of all the nodes
-					that have distance from the center of barangay less than or equal to
-					the distance of farthest vertex. In this way, you are assured that 
-					all the points inside the polygon are in this set of points(candidatePoints).
-					This also needed to make the program optimized. Instead of iterating 
-					and checking if each fort.14 nodes inside the polygon, you just have to check 
-					the set of points that satisfy above conditions.
-				'''
-				self.findCandidatePoints(center,maxDist,candidatePoints,candidatePoints_index)
-
-				'''		Case 1. There are candidatePoints
-							1.1 There are points inside the polygon
-								Find the maximum elevation of all the points inside the polygon
-								and update Warnings for that town. Mark all the points that is already been
-								in some the polygons, for deletion later to further decrease nodes from fort.14.
-							1.2 There are no points inside the polygon
-								Extract the shoreline of the given town. And check for measurements that are within
-								self.radiusOffset meters away. Get maximum of all these measurements.
-						Case 2. There are no candidatePoints
-							Do Nothing
-
-				'''
-				if candidatePoints!=[]:	
-					self.filterNodes(parts,geom,candidatePoints,paths,insides)
-					for inside in insides:
-						for i in range(0,len(inside)):
-							if(inside[i]):
-								pointIndexInsideGeom.append(candidatePoints_index[i])
-
-
-					if pointIndexInsideGeom!=[]:
-						self.updateWarnings(pointIndexInsideGeom,town_name)
-
-					else:
-						pass
-						#tanungin kay ma'am kungkailangan niya to. 
-
-						#shoreline=self.getShoreline(geom)
-						#shorelineWarnings=self.updateShorelineWarnings(shoreline,candidatePoints,candidatePoints_index)
-						#print(shorelineWarnings)	
-		
+				town_name = record[6]
+				tasks.append((townIndex,town_name))
+
+		#build what the towns share before the workers are forked, so it is done once,
+		#and the shoreline indexes only if a town has no nodes inside
+		if self.townNodes:
+			self.inputs.getBarangayIndex()
+		if any(townIndex not in self.townNodes for townIndex,town_name in tasks):
+			self.getProvinceIndex()
+			self.getNodeIndex()
+
+		for (townIndex,town_name),(warning,shorelineWarning) in zip(tasks,evaluate_towns(self,tasks,workers)):
+			print(town_name)
+			if warning is not None:
+				self.warnings.append(warning)
+			if shorelineWarning is not None:
+				self.shorelineWarnings.append(shorelineWarning)
 
 		
 		'''
@@ -549,8 +543,13 @@ class Warnings:
 		for i in self.notifications:
 			print(i)
 
+		for i in self.shorelineWarnings:
+			print("shoreline",i)
+
 	def writeToFile(self,directory):
 		"""Writes warning to a file with filename <province>.warnings,<province>.notifications. 
+		   Shoreline warnings (towns with no nodes inside, see getShorelineWarning) follow the warnings in
+		   <province>.warnings, under their own header, as <town>\t<maximum elevation near the coast>.
 
 		Parameters
 		----------
@@ -566,6 +565,11 @@ class Warnings:
 			for i in self.warnings:
 				f.write(str(i[2])+","+str(i[0])+"\t"+str(i[1])+"\n")
 
+			if self.shorelineWarnings:
+				f.write("Shoreline Warnings: \n")
+				for i in self.shorelineWarnings:
+					f.write(str(i[0])+"\t"+str(i[1])+"\n")
+
 			f.close()
 
 		with open(directory+self.filt+".notifications" , "a") as f:
@@ -590,53 +594,24 @@ class Warnings:
 		referenceTime = getReferenceTime(self.fort_15)
 		field_names = self.extractFieldNames(self.sf3)
 
-		for r in self.sf3.shapeRecords():
-			atr = dict(zip(field_names,r.record))
-			geom = r.shape.points
-			parts = r.shape.parts		
+		for p,record in enumerate(self.sf3.records()):
+			atr = dict(zip(field_names,record))
 
 			if atr['NAME_1'] in self.filt: 
-				paths=[]
-				insides=[]
-				self.filterNodes(parts,geom,[(self.X[i],self.Y[i]) for i in range(1,len(self.X))],paths,insides)
-
-				insides = np.transpose(insides)
-				compressedInsides=[]
-
-				for inside in insides:
-					if(any(inside)):
-						compressedInsides.append(True)
-					else:
-						compressedInsides.append(False)
-
-				if any(compressedInsides):
-					#read for 63
-					f=open(self.fort_63,'r')
+				compressedInsides=prepared_polygon(self.sf3,p).contains(np.column_stack([self.mesh.x,self.mesh.y]))
+
+				if compressedInsides.any():
+					#read for 63 (only the first timestep is needed)
 					print ('Reading fort.63 file')
-					tmp=(f.readline()[:-1]).split()
-					RUNDES=tmp[0]
-					RUNID=tmp[1]
-					AGRID=tmp[2]
-
-					tmp=(f.readline()[:-1]).split()
-					NDSETSE=int(tmp[0])	#number of iteration*300
-
-					loop=True
-					while(loop==True):
-						time=f.readline()[:-1].split()
-						#print(time)
-						time = int(time[1])
-						for i in range(0,self.NP):
-							tmp = (f.readline()[:-1]).split()
-							if(float(tmp[1]) > .1524):
-								if(compressedInsides[i]):
-									self.earliestSurges.append((atr['NAME_1'],(self.X[i+1],self.Y[i+1]),referenceTime + datetime.timedelta(seconds=time)))
-
-
-						loop = False
-						#print(self.earliestSurges)							
-
-					f.close()
+					frames=iter_fort63(self.fort_63)
+					time,it,eta=next(frames)
+					frames.close()
+
+					for i in np.flatnonzero(eta > .1524):
+						if(compressedInsides[i]):
+							self.earliestSurges.append((atr['NAME_1'],(float(self.mesh.x[i]),float(self.mesh.y[i])),referenceTime + datetime.timedelta(seconds=time)))
+					#print(self.earliestSurges)
+
 				else:
 					print("province out of range")
 
@@ -655,30 +630,14 @@ class Warnings:
 		f.write("Earliest Surges: \n")		
 
 		field_names = self.extractFieldNames(self.sf2)
-		for r in self.sf2.shapeRecords():
-			atr = dict(zip(field_names,r.record))
-			#geom = r.shape.points
-			#parts = r.shape.parts		
+		for i,record in enumerate(self.sf2.records()):
+			atr = dict(zip(field_names,record))
 			#[j[0] for j in self.warnings]
 			if atr['NAME_1'] == self.filt and atr['NAME_2'] in [j[0] for j in self.warnings]: 
-				geom = r.shape.points
-				parts = r.shape.parts		
-
-				barangay_name = r.record[8]
-				paths=[]
-				insides=[]
-				self.filterNodes(parts,geom,[info[1] for info in self.earliestSurges],paths,insides)
-				
-				compressedInsides=[]
 
-				for inside in insides:
-					#print(inside)
-					if(any(inside)):
-						compressedInsides.append(True)
-					else:
-						compressedInsides.append(False)
+				barangay_name = record[8]
 
-				if(any(compressedInsides)):
+				if prepared_polygon(self.sf2,i).contains([info[1] for info in self.earliestSurges]).any():
 					print(atr['NAME_3'],atr['NAME_2'],atr['NAME_1'],str(self.earliestSurges[0][2]))
 
 					#f.write(atr['NAME_3']+","+atr['NAME_2']+","+atr['NAME_1']+"\t"+str(self.earliestSurges[0][2])+"\n")
@@ -688,6 +647,119 @@ class Warnings:
 
 
 
+class WarningsBatch:
+	"""
+	Generates the warnings of several provinces for one storm.
+	The shapefiles, fort_14 and maxelev63 are read once (see WarningInputs) and every province gets its own
+	Warnings on top of them, so the node labels (one crosswalk for all the provinces, see WarningInputs.getLabels),
+	the node KD-tree and the barangay index are built once for the whole batch instead of once per province.
+
+	"""
+
+	def __init__(self,shape_file,shape2_file,shape3_file,provinces,fort_14,fort_15,maxelev63,fort_63,radiusOffset,neighborFilesDir):
+		"""
+		Parameters
+		----------
+		shape_file : .shp file
+			.shp file for towns/municipalities/cities.
+		shape2_file : .shp file
+			.shp file for barangays.
+		shape3_file : .shp file
+			.shp file for provinces.
+		provinces : list
+			provinces (NAME_1) to generate warnings for; all the provinces with wet nodes inside or off their coast if None (see getTouchedProvinces)
+		fort_14,fort_15,maxelev63,fort_63,radiusOffset,neighborFilesDir :
+			same as for Warnings; fort_15 and fort_63 are only read for the earliest surges and can be None
+		"""
+
+		self.shape_file=shape_file
+		self.shape2_file=shape2_file
+		self.shape3_file=shape3_file
+		self.fort_14=fort_14
+		self.fort_15=fort_15
+		self.maxelev63=maxelev63
+		self.fort_63=fort_63
+		self.radiusOffset=radiusOffset
+		self.neighborFilesDir=neighborFilesDir
+
+		self.inputs = WarningInputs(shape_file,shape2_file,shape3_file,fort_14,maxelev63)
+		self.provinces = list(provinces) if provinces is not None else self.getTouchedProvinces()
+		#province -> Warnings, in the order of self.provinces
+		self.provinceWarnings = {}
+
+	def getTouchedProvinces(self):
+		"""
+		Gets the provinces that can get a warning: the ones that contain at least one wet node of the mesh,
+		and the ones with wet nodes within SHORELINE_DISTANCE meters of their outline in self.shape3_file,
+		whose towns can get shoreline warnings (see Warnings.getShorelineWarning) even with no wet node inside.
+
+		Returns
+		-------
+			list
+				NAME_1 of the provinces, in the order of their first town in self.shape_file
+		"""
+
+		labels = self.inputs.getLabels().restrict(np.flatnonzero(self.inputs.maxele != -99999))
+		touched = set(labels.provinces[i] for i in np.unique(labels.province[labels.province >= 0]))
+
+		#record id of the first outline of every province in self.shape3_file
+		outlines = {}
+		for p,province in enumerate(record_provinces(self.inputs.sf3)):
+			outlines.setdefault(province,p)
+		provinces = []
+		seen = set()
+		for province in record_provinces(self.inputs.sf):
+			if province in seen:
+				continue
+			seen.add(province)
+			if province not in touched and province in outlines:
+				if len(nodes_near_outline(prepared_polygon(self.inputs.sf3,outlines[province]),self.inputs.getNodeIndex(),SHORELINE_DISTANCE)):
+					touched.add(province)
+			if province in touched:
+				provinces.append(province)
+		return provinces
+
+	def createNeighborFiles(self):
+		#writes the .neighbors files that are missing, all in one pass over the town shapefile
+		missing = [province for province in self.provinces if not os.path.exists(self.neighborFilesDir+province+".neighbors")]
+		if missing:
+			print("creating neighbor files for",", ".join(missing))
+			write_neighbor_files(self.inputs.sf,self.neighborFilesDir,missing)
+
+	def generateWarnings(self,workers=1):
+		"""Generates the warnings/notifications of every province of the batch (see Warnings.generateWarnings).
+
+		Parameters
+		----------
+		workers : int
+			number of worker processes evaluating the towns of each province, all the cores if None
+		Returns
+		-------
+		"""
+
+		self.createNeighborFiles()
+		for province in self.provinces:
+			print("province",province)
+			warnings = Warnings(self.shape_file,self.shape2_file,self.shape3_file,province,self.fort_14,self.fort_15,
+				self.maxelev63,self.fort_63,self.radiusOffset,self.neighborFilesDir,self.inputs)
+			warnings.generateWarnings(workers)
+			self.provinceWarnings[province] = warnings
+
+	def writeToFile(self,directory):
+		"""Writes the <province>.warnings and <province>.notifications files of every province of the batch.
+
+		Parameters
+		----------
+		directory : string
+			path to where to place the output files.
+		Returns
+		-------
+		"""
+
+		for province in self.provinces:
+			self.provinceWarnings[province].writeToFile(directory)
+
+
 class MaxKmlGenerator():
 	"""
 	Responsible for creating kml files for visualization in website.
@@ -745,47 +817,19 @@ class MaxKmlGenerator():
 		fields = sf.fields[1:] 
 		return [field[0] for field in fields]
 
-	def filterNodes(self,parts,geom,X,Y,paths,insides):
-		"""
-		Finds all the points in a given list of points that are inside a polygon.
-		For all closed paths. Filter all the points in candidatePoints that are inside that closed paths.
-		
-		Parameters
-		----------
-
-		Returns
-		-------
-
-		"""
-		for i in range(0,len(parts)):
-			if(i < len(parts) - 1):
-				path = mpltPath.Path(geom[parts[i]:parts[i+1]])		
-				inside=path.contains_points([(X[j],Y[j]) for j in range(1,len(X))])
-				paths.append(path)
-				insides.append(inside)
-			else:
-				path = mpltPath.Path(geom[parts[i]:len(geom)])		
-				inside=path.contains_points([(X[j],Y[j]) for j in range(1,len(X))])				
-				paths.append(path)
-				insides.append(inside)
-
 	def writeToKml(self):
-		AGRID,NE,NP,X,Y,DP,NM = read_fort14(self.fort14)
+		AGRID,NE,NP,X,Y,DP,NM = load_mesh(self.fort14).to_lists()
 		RUNDES,RUNID,AGRID,NDSETSE,ETA = read_maxelev63(self.maxelev63)
 		print ('number of elements: ',NE, '\tnumber of Nodes: ',NP)
 		
 		sf =  shapefile.Reader(self.shapeFile)
 		field_names = self.extractFieldnames(sf)
 
-		for r in sf.shapeRecords():
-			atr = dict(zip(field_names,r.record))
-			geom = r.shape.points
-			parts = r.shape.parts		
+		for i,record in enumerate(sf.records()):
+			atr = dict(zip(field_names,record))
 
 			if atr['NAME_1'] in self.filt: 
-				paths=[]
-				insides=[]
-				self.filterNodes(parts,geom,X,Y,paths,insides)
+				inside=prepared_polygon(sf,i).contains(np.column_stack([X[1:],Y[1:]]))
 
 				#print ('writing to file '+	)
 				if self.typhoonName!="" or self.eventId!="":
@@ -797,62 +841,60 @@ class MaxKmlGenerator():
 				g.write('<kml xmlns="http://earth.google.com/kml/2.0"> <Document>\n')
 				for k in range(1,NE+1):
 
-					for inside in insides:
-
-						if (inside[NM[k][0]-1]==True or inside[NM[k][1]-1]==True or inside[NM[k][2]-1]==True):
-							color='#00ffffff'
-							ave=max(ETA[NM[k][0]],ETA[NM[k][1]],ETA[NM[k][2]])
-							
-							if ave < -1 and ave != -99999:
-								R=49
-								B=255
-								G=49
-								color='#a0%02x%02x%02x' % (B,G,R)	
-							elif ave >= -1 and ave <0:
-								R=49
-								B=255
-								G=49 + int(((ave-(-1))/(0-(-1)))*(206))
-								color='#a0%02x%02x%02x' % (B,G,R)
-							elif ave >= 0 and ave <1:
-								R=49
-								G=255
-								B= 255 - int(((ave-0)/(1-0))*(206))
-								color='#a0%02x%02x%02x' % (B,G,R)			
-							elif ave >= 1 and ave <2:
-								B=49
-								G=255
-								R= 49 + int(((ave-1)/(2-1))*(206))
-								color='#a0%02x%02x%02x' % (B,G,R)
-							elif ave >=2 and ave < 3:
-								R=255
-								B=49
-								G= 255 - int(((ave-2)/(3-2))*(206))
-								color='#a0%02x%02x%02x' % (B,G,R)
-							elif ave >=3 and ave <4:
-								R=255
-								B=49 + int(((ave-3)/(4-3))*(206))
-								G=49
-								color='#a0%02x%02x%02x' % (B,G,R)				
-							elif ave >=4:
-								R=255
-								B=255
-								G=0
-								color='#a0%02x%02x%02x' % (B,G,R)
-							g.write('<Placemark>\n')
-							g.write(' <Polygon> <outerBoundaryIs>  <LinearRing>  \n')
-							g.write('  <coordinates>\n')
-							g.write('     '+str(X[NM[k][0]])+','+str(Y[NM[k][0]])+'\n')	
-							g.write('     '+str(X[NM[k][1]])+','+str(Y[NM[k][1]])+'\n')	
-							g.write('     '+str(X[NM[k][2]])+','+str(Y[NM[k][2]])+'\n')	
-							g.write('  </coordinates>\n')				
-							g.write(' </LinearRing> </outerBoundaryIs> </Polygon>\n')
-							g.write(' <Style>\n')
-							g.write('  <PolyStyle>\n')
-							g.write('   <color>'+color+'</color>\n')
-							g.write('  <outline>0</outline>\n')
-							g.write('  </PolyStyle>\n')
-							g.write(' </Style>\n')
-							g.write('</Placemark>\n')
+					if (inside[NM[k][0]-1]==True or inside[NM[k][1]-1]==True or inside[NM[k][2]-1]==True):
+						color='#00ffffff'
+						ave=max(ETA[NM[k][0]],ETA[NM[k][1]],ETA[NM[k][2]])
+						
+						if ave < -1 and ave != -99999:
+							R=49
+							B=255
+							G=49
+							color='#a0%02x%02x%02x' % (B,G,R)	
+						elif ave >= -1 and ave <0:
+							R=49
+							B=255
+							G=49 + int(((ave-(-1))/(0-(-1)))*(206))
+							color='#a0%02x%02x%02x' % (B,G,R)
+						elif ave >= 0 and ave <1:
+							R=49
+							G=255
+							B= 255 - int(((ave-0)/(1-0))*(206))
+							color='#a0%02x%02x%02x' % (B,G,R)			
+						elif ave >= 1 and ave <2:
+							B=49
+							G=255
+							R= 49 + int(((ave-1)/(2-1))*(206))
+							color='#a0%02x%02x%02x' % (B,G,R)
+						elif ave >=2 and ave < 3:
+							R=255
+							B=49
+							G= 255 - int(((ave-2)/(3-2))*(206))
+							color='#a0%02x%02x%02x' % (B,G,R)
+						elif ave >=3 and ave <4:
+							R=255
+							B=49 + int(((ave-3)/(4-3))*(206))
+							G=49
+							color='#a0%02x%02x%02x' % (B,G,R)				
+						elif ave >=4:
+							R=255
+							B=255
+							G=0
+							color='#a0%02x%02x%02x' % (B,G,R)
+						g.write('<Placemark>\n')
+						g.write(' <Polygon> <outerBoundaryIs>  <LinearRing>  \n')
+						g.write('  <coordinates>\n')
+						g.write('     '+str(X[NM[k][0]])+','+str(Y[NM[k][0]])+'\n')	
+						g.write('     '+str(X[NM[k][1]])+','+str(Y[NM[k][1]])+'\n')	
+						g.write('     '+str(X[NM[k][2]])+','+str(Y[NM[k][2]])+'\n')	
+						g.write('  </coordinates>\n')				
+						g.write(' </LinearRing> </outerBoundaryIs> </Polygon>\n')
+						g.write(' <Style>\n')
+						g.write('  <PolyStyle>\n')
+						g.write('   <color>'+color+'</color>\n')
+						g.write('  <outline>0</outline>\n')
+						g.write('  </PolyStyle>\n')
+						g.write(' </Style>\n')
+						g.write('</Placemark>\n')
 
 				g.write('</Document> </kml>')
 				g.close()							
\ No newline at end of file
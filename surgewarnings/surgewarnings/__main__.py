@@ -0,0 +1,70 @@
+import sys
+import shapefile
+from .neighbors import write_neighbor_files
+from . import WarningsBatch
+
+NEIGHBORS_USAGE = "usage: 'python -m surgewarnings neighbors <towns .shp file> <neighbor files directory> [province]* [--decimals <n>]'"
+BATCH_USAGE = "usage: 'python -m surgewarnings batch <towns .shp file> <barangays .shp file> <provinces .shp file> <fort.14> <maxele.63> <neighbor files directory> <output directory> [province]* [--workers <n>]'"
+
+
+def directory_path(directory):
+	#directories are used as prefixes of file names
+	if not directory.endswith("/"):
+		directory += "/"
+	return directory
+
+
+def neighbors_command(args):
+	decimals = None
+	if "--decimals" in args:
+		i = args.index("--decimals")
+		decimals = int(args[i+1])
+		del args[i:i+2]
+	if len(args) < 2:
+		print(NEIGHBORS_USAGE)
+		return
+
+	sf = shapefile.Reader(args[0])
+	directory = directory_path(args[1])
+	provinces = args[2:] or None
+	files = write_neighbor_files(sf,directory,provinces,decimals)
+	print("wrote",len(files),"neighbor files to",directory)
+
+
+def batch_command(args):
+	workers = 1
+	if "--workers" in args:
+		i = args.index("--workers")
+		workers = int(args[i+1])
+		del args[i:i+2]
+	if len(args) < 7:
+		print(BATCH_USAGE)
+		return
+
+	#the warnings only need the maximum elevations, so no fort.15 or fort.63 is asked for
+	shape_file,shape2_file,shape3_file,fort_14,maxelev63 = args[:5]
+	neighborFilesDir = directory_path(args[5])
+	outputDir = directory_path(args[6])
+	provinces = args[7:] or None
+	batch = WarningsBatch(shape_file,shape2_file,shape3_file,provinces,fort_14,None,maxelev63,None,0,neighborFilesDir)
+	batch.generateWarnings(workers)
+	batch.writeToFile(outputDir)
+	print("wrote the warnings of",len(batch.provinces),"provinces to",outputDir)
+
+
+if __name__=="__main__":
+	programInfo = " This program prepares the files surgewarnings reads besides the ADCIRC outputs.\n neighbors : writes the .neighbors file of every province (or of the given provinces) of a town shapefile\n batch : generates the warnings of the given provinces (or of all the provinces with wet nodes inside or off their coast) for one storm\n"
+
+	#check for command line arguments:
+	if len(sys.argv) == 1:
+		print(programInfo)
+		print("use 'python -m surgewarnings help' for usage")
+	elif sys.argv[1] == "help":
+		print(NEIGHBORS_USAGE)
+		print(BATCH_USAGE)
+	elif sys.argv[1] == "neighbors":
+		neighbors_command(sys.argv[2:])
+	elif sys.argv[1] == "batch":
+		batch_command(sys.argv[2:])
+	else:
+		print("Unknown command: '"+sys.argv[1]+"'")
@@ -0,0 +1,215 @@
+import os
+import json
+import hashlib
+import numpy as np
+from adpy.cache import file_digest
+from .labels import NodeLabels,label_nodes
+
+CROSSWALK_VERSION=2
+#shapefile components whose content the crosswalk depends on
+SHAPEFILE_PARTS=['.shp','.dbf']
+
+
+def shapefile_sources(shape_file):
+	"""
+	Gets the files of a shapefile that the crosswalk depends on (.shp geometry and .dbf attributes).
+
+	Parameters
+	----------
+	shape_file : string
+		path of the shapefile, with or without the .shp extension
+
+	Returns
+	-------
+		list
+	"""
+
+	base=os.path.splitext(shape_file)[0] if shape_file.lower().endswith('.shp') else shape_file
+	return [base+ext for ext in SHAPEFILE_PARTS if os.path.exists(base+ext)]
+
+
+class Crosswalk:
+	"""
+	Disk cache of the node -> town/province/barangay labels of a mesh and a pair of shapefiles.
+
+	The mesh and the administrative boundaries do not change between storms, so the labels are
+	computed once for all the nodes and stored in <cache_dir>/crosswalk-<key>.npz, where key is a
+	hash of the sha1 of the fort.14, of both shapefiles and of the province filter. The same file
+	also holds, for every element, the towns and barangays of its three nodes.
+
+	The sha1 of each input is remembered in <cache_dir>/digests.json together with its size and
+	modification time, and only recomputed when these change (like MeshCache).
+	"""
+
+	def __init__(self,fort14,shape_file,shape2_file,provinces=None,cache_dir=None):
+		"""
+		Parameters
+		----------
+		fort14 : string
+			path of the fort.14 file
+		shape_file : string
+			.shp file for towns/municipalities/cities
+		shape2_file : string
+			.shp file for barangays
+		provinces : list
+			provinces (NAME_1) whose polygons are used; all if None
+		cache_dir : string
+			directory of the cache (defaults to <fort14>.crosswalk)
+		"""
+
+		self.fort14=fort14
+		self.shape_file=shape_file
+		self.shape2_file=shape2_file
+		self.provinces=None if provinces is None else sorted(provinces)
+		self.path=cache_dir if cache_dir is not None else fort14+".crosswalk"
+		self.digests_file=os.path.join(self.path,"digests.json")
+
+	def digest(self,file,digests):
+		"""
+		Gets the sha1 of a file, reusing the one in digests if its size and modification time did not change.
+		"""
+
+		st=os.stat(file)
+		source=os.path.abspath(file)
+		known=digests.get(source)
+		if known is None or known['size']!=st.st_size or known['mtime']!=st.st_mtime:
+			known={'size':st.st_size,'mtime':st.st_mtime,'sha1':file_digest(file)}
+			digests[source]=known
+		return known['sha1']
+
+	def key(self):
+		"""
+		Gets the hash identifying the current content of the inputs.
+
+		Returns
+		-------
+			string
+		"""
+
+		try:
+			with open(self.digests_file,'r') as f:
+				digests=json.load(f)
+		except (OSError,ValueError):
+			digests={}
+		before=dict(digests)
+
+		h=hashlib.sha1()
+		h.update(("crosswalk %d\n" % CROSSWALK_VERSION).encode())
+		for file in [self.fort14]+shapefile_sources(self.shape_file)+shapefile_sources(self.shape2_file):
+			h.update((os.path.basename(file)+" "+self.digest(file,digests)+"\n").encode())
+		h.update(json.dumps(self.provinces).encode())
+
+		if digests!=before:
+			try:
+				os.makedirs(self.path,exist_ok=True)
+				tmp=self.digests_file+".tmp%d" % os.getpid()
+				with open(tmp,'w') as f:
+					json.dump(digests,f,indent=1)
+				os.replace(tmp,self.digests_file)
+			except OSError:
+				pass
+		return h.hexdigest()
+
+	def file(self,key=None):
+		return os.path.join(self.path,"crosswalk-"+(key or self.key())+".npz")
+
+	def load(self,key=None):
+		"""
+		Returns
+		-------
+			NodeLabels
+				the cached labels (with elementTown and elementBarangay), or None if there are none for the current inputs
+		"""
+
+		try:
+			with np.load(self.file(key)) as data:
+				if int(data['version'])!=CROSSWALK_VERSION:
+					return None
+				labels=NodeLabels(data['town'],data['barangay'],data['provinces'].tolist(),data['townProvince'])
+				labels.elementTown=data['elementTown']
+				labels.elementBarangay=data['elementBarangay']
+		except (OSError,KeyError,ValueError):
+			return None
+		return labels
+
+	def save(self,labels,key=None):
+		"""
+		Writes labels (with elementTown and elementBarangay) for the current inputs.
+
+		Parameters
+		----------
+		labels : NodeLabels
+			labels of all the mesh nodes
+		"""
+
+		file=self.file(key)
+		os.makedirs(self.path,exist_ok=True)
+		tmp=file+".tmp%d.npz" % os.getpid()
+		np.savez(tmp,
+			version=CROSSWALK_VERSION,
+			town=labels.town,
+			barangay=labels.barangay,
+			provinces=np.array(labels.provinces,dtype=str),
+			townProvince=labels.townProvince,
+			elementTown=labels.elementTown,
+			elementBarangay=labels.elementBarangay)
+		os.replace(tmp,file)
+
+	def clear(self):
+		"""
+		Deletes all the crosswalks in the cache directory.
+		"""
+
+		for name in os.listdir(self.path) if os.path.isdir(self.path) else []:
+			if name.startswith("crosswalk-"):
+				os.remove(os.path.join(self.path,name))
+
+
+def load_crosswalk(mesh,sf,sf2,fort14,shape_file,shape2_file,provinces=None,cache_dir=None,use_cache=True):
+	"""
+	Gets the town, province and barangay labels of all the nodes of a mesh, through the crosswalk cache.
+	The first call labels the nodes (see labels.label_nodes) and writes the cache; later calls with the
+	same fort.14 and shapefiles load it. If the cache cannot be written the labels are still returned.
+
+	Parameters
+	----------
+	mesh : adpy.Mesh or adpy.LazyMesh
+		mesh read from fort14
+	sf,sf2 : shapefile.Reader
+		town and barangay shapefiles, read from shape_file and shape2_file
+	fort14,shape_file,shape2_file : string
+		paths of the inputs, used to key the cache
+	provinces : list
+		provinces (NAME_1) whose polygons are used; all if None
+	cache_dir : string
+		directory of the cache (defaults to <fort14>.crosswalk)
+	use_cache : bool
+		if False, always label the nodes and leave the cache untouched
+
+	Returns
+	-------
+		NodeLabels
+			labels of every node, with elementTown and elementBarangay
+	"""
+
+	cache=Crosswalk(fort14,shape_file,shape2_file,provinces,cache_dir)
+	key=None
+	if use_cache:
+		try:
+			key=cache.key()
+			labels=cache.load(key)
+			if labels is not None:
+				return labels
+		except OSError as e:
+			print("could not read crosswalk cache",cache.path,e)
+			use_cache=False
+
+	labels=label_nodes(mesh.x,mesh.y,sf,sf2,provinces=provinces)
+	labels.elementTown=labels.town[mesh.triangles]
+	labels.elementBarangay=labels.barangay[mesh.triangles]
+	if use_cache:
+		try:
+			cache.save(labels,key)
+		except OSError as e:
+			print("could not write crosswalk cache",cache.path,e)
+	return labels
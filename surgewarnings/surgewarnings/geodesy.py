@@ -0,0 +1,32 @@
+import numpy as np
+from adpy.sphere import EARTH_RADIUS
+
+#largest relative error of haversine against the WGS-84 distance: about 0.56%, reached by short north-south
+#lines near the equator, where the meridian radius of curvature a(1-e^2) is 0.56% below EARTH_RADIUS
+HAVERSINE_ERROR=0.006
+
+
+def haversine(lon0,lat0,lon,lat):
+	"""
+	Great-circle distances in meters from one point to many points on a sphere of radius EARTH_RADIUS.
+	Within HAVERSINE_ERROR (0.6%) of the ellipsoidal distance computed by geopy.
+
+	Parameters
+	----------
+	lon0,lat0 : float
+		longitude and latitude of the center, in degrees
+	lon,lat : array-like
+		longitudes and latitudes of the points, in degrees
+
+	Returns
+	-------
+		numpy.ndarray
+			distance of every point to the center, in meters
+	"""
+
+	phi0=np.radians(lat0)
+	phi=np.radians(np.asarray(lat,dtype=np.float64))
+	dphi=phi-phi0
+	dlam=np.radians(np.asarray(lon,dtype=np.float64)-lon0)
+	h=np.sin(dphi/2)**2+np.cos(phi0)*np.cos(phi)*np.sin(dlam/2)**2
+	return 2*EARTH_RADIUS*np.arcsin(np.sqrt(np.clip(h,0,1)))
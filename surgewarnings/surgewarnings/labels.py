@@ -0,0 +1,322 @@
+import numpy as np
+from .polygons import prepared_polygon,shape_bbox
+
+
+class PolygonIndex:
+	"""
+	Bounding-box index over the polygons of a shapefile, used to label many points at once.
+
+	Only the bbox of every polygon is held. Points are sorted once by x, so the candidates of a
+	polygon are found with a binary search on its bbox; the polygon itself (a polygons.Polygon, holes
+	excluded) is only built when it has candidates, tested, and dropped, so a national shapefile is
+	never held in memory as a whole.
+	"""
+
+	def __init__(self,bboxes,polygon):
+		"""
+		Parameters
+		----------
+		bboxes : array-like
+			(n,4) xmin,ymin,xmax,ymax of every polygon
+		polygon : function
+			gives polygon i (a polygons.Polygon) from its index
+		"""
+
+		self.bboxes=np.asarray(bboxes,dtype=np.float64).reshape(-1,4)
+		self.polygon=polygon
+
+	def __len__(self):
+		return len(self.bboxes)
+
+	def label(self,x,y,points=None):
+		"""
+		Gets, for every point, the first polygon (in index order) that contains it.
+
+		Parameters
+		----------
+		x,y : numpy.ndarray
+			coordinates of all the points
+		points : array-like
+			indices of the points to label (all if None); the others get -1
+
+		Returns
+		-------
+			numpy.ndarray
+				int32 polygon index of every point, -1 where no polygon contains it
+		"""
+
+		x=np.asarray(x,dtype=np.float64)
+		y=np.asarray(y,dtype=np.float64)
+		labels=np.full(len(x),-1,dtype=np.int32)
+		points=np.arange(len(x)) if points is None else np.asarray(points,dtype=np.intp)
+		order=points[np.argsort(x[points],kind='stable')]
+		xs=x[order]
+
+		for i in range(0,len(self)):
+			xmin,ymin,xmax,ymax=self.bboxes[i]
+			candidates=order[np.searchsorted(xs,xmin,side='left'):np.searchsorted(xs,xmax,side='right')]
+			candidates=candidates[(y[candidates]>=ymin) & (y[candidates]<=ymax) & (labels[candidates]==-1)]
+			if len(candidates)==0:
+				continue
+			inside=self.polygon(i).contains(np.column_stack([x[candidates],y[candidates]]))
+			labels[candidates[inside]]=i
+		return labels
+
+
+def group_by(labels):
+	"""
+	Groups point indices by label.
+
+	Parameters
+	----------
+	labels : numpy.ndarray
+		label of every point (-1 for none)
+
+	Returns
+	-------
+		dict
+			label -> sorted array of the indices of its points (points labeled -1 are left out)
+	"""
+
+	order=np.argsort(labels,kind='stable')
+	values,starts=np.unique(labels[order],return_index=True)
+	groups=np.split(order,starts[1:])
+	return dict((int(value),group) for value,group in zip(values,groups) if value!=-1)
+
+
+class NodeLabels:
+	"""
+	Town, province and barangay of every mesh node.
+
+	town and barangay are int32 record indices into the town and barangay shapefiles (-1 where no
+	polygon contains the node); province is an index into provinces (the NAME_1 values of the
+	labeled towns), -1 where the node has no town. elementTown and elementBarangay, when known, are
+	the (NE,3) labels of the nodes of every element.
+	"""
+
+	def __init__(self,town,barangay,provinces,townProvince):
+		self.town=town
+		self.barangay=barangay
+		self.provinces=provinces
+		self.townProvince=np.asarray(townProvince,dtype=np.int32)
+		self.province=np.append(self.townProvince,-1)[town]
+		self.elementTown=None
+		self.elementBarangay=None
+
+	def restrict(self,nodes):
+		"""
+		Gets the labels of some nodes only (e.g. the wet ones), the other nodes being labeled -1.
+
+		Parameters
+		----------
+		nodes : array-like
+			indices of the nodes to keep
+
+		Returns
+		-------
+			NodeLabels
+		"""
+
+		keep=np.zeros(len(self.town),dtype=bool)
+		keep[nodes]=True
+		labels=NodeLabels(np.where(keep,self.town,-1),np.where(keep,self.barangay,-1),self.provinces,self.townProvince)
+		labels.elementTown=self.elementTown
+		labels.elementBarangay=self.elementBarangay
+		return labels
+
+	def townNodes(self):
+		#town record index -> sorted node indices
+		return group_by(self.town)
+
+	def barangayNodes(self):
+		#barangay record index -> sorted node indices
+		return group_by(self.barangay)
+
+
+def record_provinces(sf):
+	#NAME_1 of every record of a shapefile
+	field_names=[field[0] for field in sf.fields[1:]]
+	return [dict(zip(field_names,record))['NAME_1'] for record in sf.iterRecords()]
+
+
+def label_records(sf,x,y,nodes=None,provinces=None):
+	"""
+	Labels nodes with the record index of the first polygon of sf (of the given provinces) that contains them.
+
+	Parameters
+	----------
+	sf : shapefile.Reader
+		town or barangay shapefile (records need NAME_1)
+	x,y : numpy.ndarray
+		coordinates of all the mesh nodes
+	nodes : array-like
+		indices of the nodes to label (all if None)
+	provinces : list
+		only use the polygons of these provinces (NAME_1 values); all if None
+
+	Returns
+	-------
+		numpy.ndarray
+			int32 record index of every node, -1 where no selected polygon contains it or the node is not in nodes
+	"""
+
+	#only the bboxes are gathered here, the polygons are read back one at a time by PolygonIndex
+	field_names=[field[0] for field in sf.fields[1:]]
+	bboxes=[]
+	ids=[]
+	for i,(record,shape) in enumerate(zip(sf.iterRecords(),sf.iterShapes())):
+		atr=dict(zip(field_names,record))
+		if provinces is None or atr['NAME_1'] in provinces:
+			bboxes.append(shape_bbox(shape))
+			ids.append(i)
+	index=PolygonIndex(bboxes,lambda k: prepared_polygon(sf,ids[k],keep=False))
+	labels=index.label(x,y,nodes)
+	return np.array(ids+[-1],dtype=np.int32)[labels]
+
+
+def node_labels(town,barangay,names):
+	#NodeLabels of town and barangay record indices, names being the NAME_1 of every town record
+	provinceNames=[]
+	townProvince=np.full(len(names),-1,dtype=np.int32)
+	for i in np.unique(town[town>=0]):
+		if names[i] not in provinceNames:
+			provinceNames.append(names[i])
+		townProvince[i]=provinceNames.index(names[i])
+	return NodeLabels(town,barangay,provinceNames,townProvince)
+
+
+def label_nodes(x,y,towns,barangays=None,nodes=None,provinces=None):
+	"""
+	Labels mesh nodes with the town, province and barangay that contain them, in one pass per shapefile.
+	When polygons overlap, a node goes to the first one in the shapefile, as if the towns claimed
+	their nodes one after the other.
+
+	Parameters
+	----------
+	x,y : numpy.ndarray
+		coordinates of all the mesh nodes
+	towns : shapefile.Reader
+		town shapefile (records need NAME_1)
+	barangays : shapefile.Reader
+		barangay shapefile (records need NAME_1), or None to skip barangays
+	nodes : array-like
+		indices of the nodes to label (all if None)
+	provinces : list
+		only use the polygons of these provinces (NAME_1 values); all if None
+
+	Returns
+	-------
+		NodeLabels
+	"""
+
+	town=label_records(towns,x,y,nodes,provinces)
+	if barangays is None:
+		barangay=np.full(len(x),-1,dtype=np.int32)
+	else:
+		barangay=label_records(barangays,x,y,nodes,provinces)
+	return node_labels(town,barangay,record_provinces(towns))
+
+
+def select_provinces(labels,x,y,towns,barangays,provinces):
+	"""
+	Gets from the labels of all the provinces the labels label_nodes would give with a province filter,
+	so that one labeling of the mesh serves every province.
+	A node labeled with a polygon of the selected provinces keeps it, since no earlier polygon contains it.
+	A node labeled with a polygon of another province can still be inside a later polygon of the selected
+	ones (neighboring provinces overlap along their borders), so only these nodes are labeled again,
+	against the selected polygons.
+
+	Parameters
+	----------
+	labels : NodeLabels
+		labels of all the nodes with the polygons of all the provinces (label_nodes with provinces=None)
+	x,y : numpy.ndarray
+		coordinates of all the mesh nodes
+	towns,barangays : shapefile.Reader
+		the shapefiles labels were computed from (barangays can be None)
+	provinces : list
+		provinces (NAME_1 values) to select
+
+	Returns
+	-------
+		NodeLabels
+			without elementTown and elementBarangay
+	"""
+
+	def select(sf,ids,names):
+		selected=np.array([name in provinces for name in names]+[False])
+		#ids of -1 pick the trailing False
+		keep=selected[ids]
+		result=np.where(keep,ids,-1).astype(np.int32)
+		others=np.flatnonzero((ids>=0) & ~keep)
+		if len(others):
+			result[others]=label_records(sf,x,y,others,provinces)[others]
+		return result
+
+	names=record_provinces(towns)
+	town=select(towns,labels.town,names)
+	if barangays is None:
+		barangay=np.full(len(x),-1,dtype=np.int32)
+	else:
+		barangay=select(barangays,labels.barangay,record_provinces(barangays))
+	return node_labels(town,barangay,names)
+
+
+
+
+class BarangayIndex:
+	"""
+	Barangays of a shapefile grouped by town (NAME_2), for point lookups.
+
+	The records are scanned once to group the barangay ids by town. The bounding boxes of a town's
+	barangays are gathered the first time the town is looked up, so a lookup compares the point with
+	these boxes and only tests the barangays whose box contains it.
+	"""
+
+	def __init__(self,sf):
+		"""
+		Parameters
+		----------
+		sf : shapefile.Reader
+			barangay shapefile (records need NAME_2, record[8] is the barangay name)
+		"""
+
+		self.sf=sf
+		field_names=[field[0] for field in sf.fields[1:]]
+		self.members={}
+		for i,record in enumerate(sf.records()):
+			atr=dict(zip(field_names,record))
+			self.members.setdefault(atr['NAME_2'],[]).append((i,record[8]))
+		#town -> (ids,bboxes) of its barangays, filled in on first lookup
+		self.groups={}
+
+	def group(self,town):
+		if town not in self.groups:
+			ids=[i for i,name in self.members.get(town,[])]
+			bboxes=np.array([shape_bbox(self.sf.shape(i)) for i in ids],dtype=np.float64).reshape(-1,4)
+			self.groups[town]=(ids,bboxes)
+		return self.groups[town]
+
+	def find(self,town,x,y):
+		"""
+		Finds the barangay of a town that contains a point.
+
+		Parameters
+		----------
+		town : string
+			town/city (NAME_2) of the barangay
+		x,y : float
+			coordinates of the point
+
+		Returns
+		-------
+			string
+				the barangay name, or None if no barangay of the town contains the point
+		"""
+
+		ids,bboxes=self.group(town)
+		hits=np.flatnonzero((bboxes[:,0]<=x) & (x<=bboxes[:,2]) & (bboxes[:,1]<=y) & (y<=bboxes[:,3]))
+		for k in hits:
+			if prepared_polygon(self.sf,ids[k]).contains([(x,y)])[0]:
+				return self.members[town][k][1]
+		return None
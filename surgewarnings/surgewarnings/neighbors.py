@@ -0,0 +1,132 @@
+import numpy as np
+
+
+def shared_vertices(x,y,towns,decimals=None):
+	"""
+	Finds the pairs of towns that share at least one polygon vertex.
+
+	Every vertex is keyed by its coordinates (rounded to decimals if given) and the vertices are
+	sorted once by key, so towns using the same vertex end up next to each other. Pairs are read off
+	by comparing every vertex with the following ones of the same key, so the whole graph is built
+	in one pass whatever the number of towns.
+
+	Parameters
+	----------
+	x,y : numpy.ndarray
+		coordinates of all the vertices of all the towns
+	towns : numpy.ndarray
+		town (record index) of every vertex
+	decimals : int
+		number of decimals the coordinates are rounded to before matching (exact match if None)
+
+	Returns
+	-------
+		numpy.ndarray
+			(n,2) unique pairs of towns (a,b) with a<b
+	"""
+
+	if decimals is not None:
+		x=np.round(x,decimals)
+		y=np.round(y,decimals)
+	order=np.lexsort((towns,y,x))
+	x,y,towns=x[order],y[order],towns[order]
+	#a town using the same vertex several times (closing vertex, parts) counts once
+	keep=np.ones(len(x),dtype=bool)
+	keep[1:]=(x[1:]!=x[:-1]) | (y[1:]!=y[:-1]) | (towns[1:]!=towns[:-1])
+	x,y,towns=x[keep],y[keep],towns[keep]
+
+	pairs=[]
+	d=1
+	while d<len(x):
+		same=(x[d:]==x[:-d]) & (y[d:]==y[:-d])
+		if not same.any():
+			break
+		pairs.append(np.column_stack([towns[:-d][same],towns[d:][same]]))
+		d+=1
+	if not pairs:
+		return np.zeros((0,2),dtype=np.int64)
+	return np.unique(np.concatenate(pairs),axis=0)
+
+
+def town_neighbors(sf,provinces=None,decimals=None):
+	"""
+	Builds the neighbor graph of the towns of a shapefile: two towns of the same province are
+	neighbors if their polygons share a vertex.
+
+	Parameters
+	----------
+	sf : shapefile.Reader
+		town shapefile (records need NAME_1, record[6] is the town name)
+	provinces : list
+		provinces (NAME_1) to build the graph for; all if None
+	decimals : int
+		number of decimals the vertices are rounded to before matching (exact match if None)
+
+	Returns
+	-------
+		dict
+			province -> list of (town name,[neighbor names]) in shapefile order
+	"""
+
+	field_names=[field[0] for field in sf.fields[1:]]
+	records=[]
+	xs=[]
+	ys=[]
+	ids=[]
+	for i,(record,shape) in enumerate(zip(sf.iterRecords(),sf.iterShapes())):
+		atr=dict(zip(field_names,record))
+		records.append((atr['NAME_1'],record[6]))
+		if provinces is not None and atr['NAME_1'] not in provinces:
+			continue
+		geom=np.asarray(shape.points,dtype=np.float64).reshape(-1,2)
+		xs.append(geom[:,0])
+		ys.append(geom[:,1])
+		ids.append(np.full(len(geom),i,dtype=np.int64))
+
+	adjacency={}
+	if ids:
+		for a,b in shared_vertices(np.concatenate(xs),np.concatenate(ys),np.concatenate(ids),decimals):
+			if records[a][0]==records[b][0]:
+				adjacency.setdefault(a,[]).append(b)
+				adjacency.setdefault(b,[]).append(a)
+
+	graph={}
+	for i,(province,town) in enumerate(records):
+		if provinces is not None and province not in provinces:
+			continue
+		names=[records[j][1] for j in sorted(adjacency.get(i,[])) if records[j][1]!=town]
+		graph.setdefault(province,[]).append((town,names))
+	return graph
+
+
+def write_neighbor_files(sf,directory,provinces=None,decimals=None):
+	"""
+	Writes the <province>.neighbors file of every province, in the format read by Warnings.updateNotifications:
+		<Town>[,<Neighboring Town>]*
+
+	Parameters
+	----------
+	sf : shapefile.Reader
+		town shapefile
+	directory : string
+		directory of the .neighbors files (with its trailing separator, like neighborFilesDir)
+	provinces : list
+		provinces (NAME_1) to write; all if None
+	decimals : int
+		number of decimals the vertices are rounded to before matching (exact match if None)
+
+	Returns
+	-------
+		list
+			paths of the files written
+	"""
+
+	graph=town_neighbors(sf,provinces,decimals)
+	files=[]
+	for province in (graph if provinces is None else provinces):
+		file=directory+province+".neighbors"
+		with open(file,'w') as f:
+			for town,names in graph.get(province,[]):
+				f.write(",".join([town]+names)+"\n")
+		files.append(file)
+	return files
@@ -0,0 +1,61 @@
+import os
+import multiprocessing
+
+#Warnings whose towns are evaluated by the worker processes, set in the parent before they are forked
+sharedWarnings=None
+
+
+def resolve_workers(workers):
+	#number of worker processes: all the cores if None
+	if workers is None:
+		workers=os.cpu_count() or 1
+	return max(int(workers),1)
+
+
+def evaluate_town(task):
+	#runs in a worker process: Warnings.evaluateTown on the inherited Warnings
+	return sharedWarnings.evaluateTown(*task)
+
+
+def evaluate_towns(warnings,tasks,workers=1):
+	"""
+	Evaluates towns with Warnings.evaluateTown, in a pool of worker processes if workers>1.
+
+	The workers are forked from the current process, so they see the mesh arrays, the node labels and
+	the prepared polygons of warnings without copying them (the pages are shared as long as nobody
+	writes to them, and evaluateTown only reads). Only the tasks and the results go through pipes.
+	Results come back in the order of tasks, whatever the order the workers finish in. Platforms that
+	cannot fork fall back to evaluating the towns in this process.
+
+	Parameters
+	----------
+	warnings : Warnings
+		the warnings of a province, with its towns' nodes already labeled
+	tasks : list
+		(townIndex,town_name) of every town to evaluate
+	workers : int
+		number of worker processes, all the cores if None
+
+	Returns
+	-------
+		list
+			(warning,shorelineWarning) of every task, in the order of tasks
+	"""
+
+	global sharedWarnings
+	workers=min(resolve_workers(workers),len(tasks))
+	if workers>1:
+		try:
+			context=multiprocessing.get_context("fork")
+		except ValueError:
+			print("fork is not available, evaluating towns serially")
+			workers=1
+	if workers<=1:
+		return [warnings.evaluateTown(*task) for task in tasks]
+
+	sharedWarnings=warnings
+	try:
+		with context.Pool(workers) as pool:
+			return pool.map(evaluate_town,tasks,chunksize=max(1,len(tasks)//(4*workers)))
+	finally:
+		sharedWarnings=None
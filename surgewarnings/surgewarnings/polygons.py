@@ -0,0 +1,205 @@
+import os
+import collections
+import numpy as np
+import matplotlib.path as mpltPath
+
+#most vertices of the polygons kept by prepared_polygon (about 32 bytes each with their paths, so
+#~160 MB), the least recently used polygons are dropped first
+PREPARED_POINTS_MAX=5000000
+#(shapefile,record id) -> Polygon, in least recently used order
+preparedPolygons=collections.OrderedDict()
+#number of vertices of the polygons in preparedPolygons
+preparedPoints=0
+
+
+def ring_area(ring):
+	"""
+	Signed area of a closed ring (shoelace formula): positive if counter-clockwise, negative if clockwise.
+
+	Parameters
+	----------
+	ring : numpy.ndarray
+		(N,2) vertices of the ring
+
+	Returns
+	-------
+		float
+	"""
+
+	x,y=ring[:,0],ring[:,1]
+	return 0.5*(np.dot(x,np.roll(y,-1))-np.dot(np.roll(x,-1),y))
+
+
+def ring_bbox(ring):
+	#xmin,ymin,xmax,ymax of a ring (empty box for an empty ring)
+	if len(ring)==0:
+		return (np.inf,np.inf,-np.inf,-np.inf)
+	return (ring[:,0].min(),ring[:,1].min(),ring[:,0].max(),ring[:,1].max())
+
+
+def shape_bbox(shape):
+	#xmin,ymin,xmax,ymax of a shapefile.Shape as stored in the .shp (empty box for a null shape)
+	bbox=getattr(shape,'bbox',None)
+	if bbox is None or len(shape.points)==0:
+		return (np.inf,np.inf,-np.inf,-np.inf)
+	return tuple(float(v) for v in bbox)
+
+
+class Polygon:
+	"""
+	A shapefile polygon (all of its parts) prepared for point-in-polygon tests.
+
+	Shapefiles store outer rings clockwise and holes counter-clockwise. A point is inside the polygon
+	if it is inside more outer rings than holes, so points in a hole (e.g. a lake, or an enclave
+	belonging to another town) are left out while an island inside a hole is kept. Shapes whose rings
+	all run counter-clockwise do not follow the convention and all their rings are taken as outer rings.
+
+	Every ring keeps its bounding box: points outside it are rejected with array comparisons and only
+	the remaining ones go through the exact test, so the many small island parts of a coastal town
+	cost almost nothing for points far from them.
+	"""
+
+	def __init__(self,geom,parts):
+		"""
+		Parameters
+		----------
+		geom : list
+			points of the shape (shape.points)
+		parts : list
+			index of the first point of every part (shape.parts)
+		"""
+
+		geom=np.asarray(geom,dtype=np.float64).reshape(-1,2)
+		self.points=geom
+		bounds=list(parts)+[len(geom)]
+		rings=[geom[bounds[i]:bounds[i+1]] for i in range(0,len(parts))]
+		self.rings=[mpltPath.Path(ring) for ring in rings]
+		#(n,4) xmin,ymin,xmax,ymax of every ring
+		self.ringBboxes=np.array([ring_bbox(ring) for ring in rings],dtype=np.float64).reshape(-1,4)
+		clockwise=[ring_area(ring)<0 for ring in rings]
+		if any(clockwise):
+			self.signs=[1 if cw else -1 for cw in clockwise]
+		else:
+			self.signs=[1]*len(rings)
+		self.bbox=ring_bbox(geom)
+		self.areas=[ring_area(ring) for ring in rings]
+		self.loadedCentroid=None
+
+	@classmethod
+	def fromShape(cls,shape):
+		return cls(shape.points,shape.parts)
+
+	@property
+	def centroid(self):
+		#area-weighted centroid of the rings (holes subtracted), or the mean vertex of a degenerate shape
+		if self.loadedCentroid is None:
+			total=0.0
+			cx=cy=0.0
+			for path,sign,area in zip(self.rings,self.signs,self.areas):
+				ring=path.vertices
+				if len(ring)<3 or area==0:
+					continue
+				x,y=ring[:,0],ring[:,1]
+				x1,y1=np.roll(x,-1),np.roll(y,-1)
+				cross=x*y1-x1*y
+				weight=sign*abs(area)
+				cx+=weight*np.dot(x+x1,cross)/(6*area)
+				cy+=weight*np.dot(y+y1,cross)/(6*area)
+				total+=weight
+			if total!=0:
+				self.loadedCentroid=(float(cx/total),float(cy/total))
+			elif len(self.points):
+				self.loadedCentroid=tuple(self.points.mean(axis=0).tolist())
+			else:
+				self.loadedCentroid=(np.nan,np.nan)
+		return self.loadedCentroid
+
+	def contains(self,points):
+		"""
+		Tests a batch of points against all the parts of the polygon.
+
+		Parameters
+		----------
+		points : array-like
+			(N,2) points as (x,y)
+
+		Returns
+		-------
+			numpy.ndarray
+				boolean mask, True for the points inside the polygon
+		"""
+
+		points=np.asarray(points,dtype=np.float64).reshape(-1,2)
+		count=np.zeros(len(points),dtype=np.int16)
+		if len(points)==0:
+			return count>0
+		x,y=points[:,0],points[:,1]
+		for path,sign,(xmin,ymin,xmax,ymax) in zip(self.rings,self.signs,self.ringBboxes):
+			near=np.flatnonzero((x>=xmin) & (x<=xmax) & (y>=ymin) & (y<=ymax))
+			if len(near)==0:
+				continue
+			count[near]+=sign*path.contains_points(points[near])
+		return count>0
+
+	def inside(self,points):
+		"""
+		Same as contains, but gives the indices of the points inside the polygon.
+
+		Returns
+		-------
+			numpy.ndarray
+				sorted indices into points
+		"""
+
+		return np.flatnonzero(self.contains(points))
+
+
+def shapefile_key(sf):
+	#path of a shapefile.Reader, or the reader itself when it was opened from file objects
+	name=getattr(sf,'shapeName',None)
+	if name is None or name=='Not specified':
+		return id(sf)
+	return os.path.abspath(name)
+
+
+def prepared_polygon(sf,i,shape=None,keep=True):
+	"""
+	Gets record i of a shapefile as a Polygon, from a process-wide cache.
+	The cache is keyed by shapefile path and record id and is bounded by the total number of vertices
+	of its polygons (PREPARED_POINTS_MAX), not by their count, since a town with many islands can weigh
+	as much as hundreds of barangays. Within that budget the paths, bounding boxes and centroids of the
+	same towns and barangays are built once even when every warning, barangay lookup and map goes
+	through the shapefile again. Passes over a whole shapefile that need every polygon only once (e.g.
+	labels.label_nodes) use keep=False, so they neither grow the cache nor evict the polygons in use.
+
+	Parameters
+	----------
+	sf : shapefile.Reader
+		the shapefile
+	i : int
+		record id
+	shape : shapefile.Shape
+		the shape of record i if it was already read (read from sf otherwise)
+	keep : bool
+		if False, a polygon that is not cached yet is built without being added to the cache
+
+	Returns
+	-------
+		Polygon
+	"""
+
+	global preparedPoints
+	key=(shapefile_key(sf),i)
+	polygon=preparedPolygons.get(key)
+	if polygon is not None:
+		preparedPolygons.move_to_end(key)
+		return polygon
+	polygon=Polygon.fromShape(shape if shape is not None else sf.shape(i))
+	if not keep:
+		return polygon
+	preparedPolygons[key]=polygon
+	preparedPoints+=len(polygon.points)
+	while preparedPoints>PREPARED_POINTS_MAX and len(preparedPolygons)>1:
+		key,dropped=preparedPolygons.popitem(last=False)
+		preparedPoints-=len(dropped.points)
+	return polygon
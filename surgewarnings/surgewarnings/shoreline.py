@@ -0,0 +1,178 @@
+import numpy as np
+from adpy.sphere import EARTH_RADIUS,unit_vectors
+from .geodesy import haversine
+
+#coastline segments are split so that consecutive points are at most this many meters apart
+DENSIFY_SPACING=50.0
+#distance to the coast (meters) within which measurements count for a town's shoreline warning
+SHORELINE_DISTANCE=1000.0
+
+
+def coastline_segments(town,province):
+	"""
+	Gets the edges of a town polygon that lie on the outline of its province, i.e. its coastline.
+	An edge is on the coast if it is also an edge of the province polygon (its two ends are consecutive
+	vertices of a province ring), so a straight inland border between two coastal vertices is not.
+	Shared vertices that are not part of such an edge are kept as zero-length segments.
+
+	Parameters
+	----------
+	town : polygons.Polygon
+		the town
+	province : polygons.Polygon
+		the province the town is in
+
+	Returns
+	-------
+		numpy.ndarray
+			(n,2,2) segments as ((x0,y0),(x1,y1))
+	"""
+
+	provinceVertices=province.points[:,0]+1j*province.points[:,1]
+	#edges of the province rings, both ways
+	provinceEdges=set()
+	for path in province.rings:
+		ring=path.vertices.tolist()
+		for a,b in zip(ring[:-1],ring[1:]):
+			provinceEdges.add((a[0],a[1],b[0],b[1]))
+			provinceEdges.add((b[0],b[1],a[0],a[1]))
+	segments=[]
+	for path in town.rings:
+		ring=path.vertices
+		onCoast=np.isin(ring[:,0]+1j*ring[:,1],provinceVertices)
+		if len(ring)<2:
+			edges=np.zeros(0,dtype=bool)
+		else:
+			edges=onCoast[:-1] & onCoast[1:]
+			for k in np.flatnonzero(edges):
+				edges[k]=(ring[k,0],ring[k,1],ring[k+1,0],ring[k+1,1]) in provinceEdges
+			segments.append(np.stack([ring[:-1][edges],ring[1:][edges]],axis=1))
+		#vertices on the coast that are not the end of a coastal edge
+		alone=onCoast.copy()
+		alone[:-1]&=~edges
+		alone[1:]&=~edges
+		if alone.any():
+			segments.append(np.stack([ring[alone],ring[alone]],axis=1))
+	if not segments:
+		return np.zeros((0,2,2),dtype=np.float64)
+	#the closing vertex of a ring is also its first one
+	return np.unique(np.concatenate(segments).reshape(-1,4),axis=0).reshape(-1,2,2)
+
+
+def densify(segments,spacing=DENSIFY_SPACING):
+	"""
+	Splits segments into points at most spacing meters apart.
+
+	Parameters
+	----------
+	segments : numpy.ndarray
+		(n,2,2) segments as ((lon0,lat0),(lon1,lat1))
+	spacing : float
+		maximum distance between consecutive points, in meters
+
+	Returns
+	-------
+		numpy.ndarray
+			(m,2) points as (lon,lat), the ends of every segment included
+	"""
+
+	segments=np.asarray(segments,dtype=np.float64).reshape(-1,2,2)
+	if len(segments)==0:
+		return np.zeros((0,2),dtype=np.float64)
+	start,end=segments[:,0],segments[:,1]
+	lengths=haversine(start[:,0],start[:,1],end[:,0],end[:,1])
+	steps=np.maximum(np.ceil(lengths/spacing).astype(np.int64),1)
+	#position of every point along its segment, from 0 (start) to 1 (end)
+	owner=np.repeat(np.arange(len(segments)),steps+1)
+	offsets=np.arange(len(owner))-np.repeat(np.cumsum(steps+1)-(steps+1),steps+1)
+	t=(offsets/steps[owner])[:,None]
+	return start[owner]+t*(end[owner]-start[owner])
+
+
+class ShorelineBuffer:
+	"""
+	Answers "which mesh nodes are within D meters of this coastline".
+
+	The coastline is densified into points at most spacing meters apart, and the nodes near each point
+	are found with a ball query of the node KD-tree (spatial.NodeIndex).
+	Distances are on a sphere of radius EARTH_RADIUS (within geodesy.HAVERSINE_ERROR of WGS-84) and overestimate the
+	distance to the segments themselves by at most spacing/2.
+	"""
+
+	def __init__(self,segments,spacing=DENSIFY_SPACING):
+		"""
+		Parameters
+		----------
+		segments : numpy.ndarray
+			(n,2,2) coastline segments as ((lon0,lat0),(lon1,lat1)); points can be given as zero-length segments
+		spacing : float
+			maximum distance between the indexed points, in meters
+		"""
+
+		self.points=densify(segments,spacing)
+
+	def __len__(self):
+		return len(self.points)
+
+	def query(self,nodeIndex,distance):
+		"""
+		Finds the nodes of a spatial.NodeIndex within distance meters of the coastline, with one ball
+		query of the node tree per coastline point.
+
+		Returns
+		-------
+			numpy.ndarray
+				sorted 0-based mesh node indices
+		"""
+
+		if len(self.points)==0 or len(nodeIndex)==0:
+			return np.zeros(0,dtype=np.intp)
+		angle=min(distance/EARTH_RADIUS,np.pi)
+		hits=nodeIndex.tree.query_ball_point(unit_vectors(self.points[:,0],self.points[:,1]),2*np.sin(angle/2))
+		hits=np.unique(np.concatenate([np.asarray(h,dtype=np.intp) for h in hits]))
+		return nodeIndex.nodes[hits]
+
+
+def outline_segments(polygon):
+	"""
+	Gets the edges of all the rings of a polygon, e.g. the outline of a province.
+
+	Parameters
+	----------
+	polygon : polygons.Polygon
+		the polygon
+
+	Returns
+	-------
+		numpy.ndarray
+			(n,2,2) segments as ((x0,y0),(x1,y1))
+	"""
+
+	segments=[np.stack([path.vertices[:-1],path.vertices[1:]],axis=1) for path in polygon.rings if len(path.vertices)>1]
+	if not segments:
+		return np.zeros((0,2,2),dtype=np.float64)
+	return np.concatenate(segments)
+
+
+def nodes_near_outline(polygon,nodeIndex,distance=SHORELINE_DISTANCE,spacing=DENSIFY_SPACING):
+	"""
+	Finds the nodes of a spatial.NodeIndex within distance meters of the outline of a polygon (see
+	ShorelineBuffer.query). If no node is in the bounding box of the polygon grown by distance, the
+	outline is not densified at all, so polygons far from the mesh cost a few array comparisons.
+
+	Returns
+	-------
+		numpy.ndarray
+			sorted 0-based mesh node indices
+	"""
+
+	if len(nodeIndex)==0:
+		return np.zeros(0,dtype=np.intp)
+	xmin,ymin,xmax,ymax=polygon.bbox
+	margin=np.degrees(min(distance/EARTH_RADIUS,np.pi))
+	lat=min(max(abs(ymin),abs(ymax))+margin,90.0)
+	lonMargin=margin/np.cos(np.radians(lat)) if lat<89.0 else 360.0
+	x,y=nodeIndex.x[nodeIndex.nodes],nodeIndex.y[nodeIndex.nodes]
+	if not ((x>=xmin-lonMargin)&(x<=xmax+lonMargin)&(y>=ymin-margin)&(y<=ymax+margin)).any():
+		return np.zeros(0,dtype=np.intp)
+	return ShorelineBuffer(outline_segments(polygon),spacing).query(nodeIndex,distance)
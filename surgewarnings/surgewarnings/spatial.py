@@ -0,0 +1,31 @@
+import numpy as np
+from scipy.spatial import cKDTree
+from adpy.sphere import unit_vectors
+
+
+class NodeIndex:
+	"""
+	KD-tree over mesh nodes on the unit sphere. A distance of r meters is a chord of
+	2*sin(r/(2*EARTH_RADIUS)) on the unit sphere, so radius queries are ball queries of the tree
+	(see shoreline.ShorelineBuffer.query). tree indexes self.nodes, in that order.
+	"""
+
+	def __init__(self,x,y,nodes=None):
+		"""
+		Parameters
+		----------
+		x : numpy.ndarray
+			longitudes of all the mesh nodes
+		y : numpy.ndarray
+			latitudes of all the mesh nodes
+		nodes : array-like
+			0-based indices of the nodes to index (all nodes if None), e.g. only the wet ones
+		"""
+
+		self.x=np.asarray(x,dtype=np.float64)
+		self.y=np.asarray(y,dtype=np.float64)
+		self.nodes=np.arange(len(self.x)) if nodes is None else np.asarray(nodes,dtype=np.intp)
+		self.tree=cKDTree(unit_vectors(self.x[self.nodes],self.y[self.nodes]))
+
+	def __len__(self):
+		return len(self.nodes)
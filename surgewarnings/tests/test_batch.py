@@ -0,0 +1,101 @@
+import os
+import numpy as np
+import shapefile
+from surgewarnings import WarningsBatch
+
+FIELDS=['ID_0','ISO','NAME_0','ID_1','NAME_1','ID_2','NAME_2']
+
+#mesh nodes on a 5x5 grid 0.005 degrees (about 540 m) apart
+LON=np.linspace(120.00,120.02,5)
+LAT=np.linspace(14.00,14.02,5)
+
+#Inland covers the western half of the mesh; Coastal starts 0.005 degrees east of the mesh, so it has no
+#node inside but the eastern column of nodes is within SHORELINE_DISTANCE of its coast; Farprov is far away
+PROVINCES=[
+	('Inland',(119.999,120.0105,13.999,14.021)),
+	('Coastal',(120.025,120.035,14.00,14.02)),
+	('Farprov',(121.0,121.1,15.0,15.1)),
+]
+
+
+def rect(xmin,xmax,ymin,ymax):
+	#clockwise, as outer rings are stored in shapefiles
+	return [(xmin,ymin),(xmin,ymax),(xmax,ymax),(xmax,ymin),(xmin,ymin)]
+
+
+def write_shapefiles(directory):
+	towns=shapefile.Writer(os.path.join(directory,'towns'),shapeType=shapefile.POLYGON)
+	barangays=shapefile.Writer(os.path.join(directory,'barangays'),shapeType=shapefile.POLYGON)
+	provinces=shapefile.Writer(os.path.join(directory,'provinces'),shapeType=shapefile.POLYGON)
+	for name in FIELDS:
+		towns.field(name,'C',40)
+	for name in FIELDS+['ID_3','NAME_3']:
+		barangays.field(name,'C',40)
+	for name in FIELDS[:5]:
+		provinces.field(name,'C',40)
+
+	for i,(province,box) in enumerate(PROVINCES):
+		town=province+'Town'
+		towns.poly([rect(*box)])
+		towns.record('1','PHL','Philippines',str(i),province,str(i),town)
+		barangays.poly([rect(*box)])
+		barangays.record('1','PHL','Philippines',str(i),province,str(i),town,str(i),town+'Barangay')
+		provinces.poly([rect(*box)])
+		provinces.record('1','PHL','Philippines',str(i),province)
+	towns.close()
+	barangays.close()
+	provinces.close()
+
+
+def write_mesh(directory,eta):
+	x,y=np.meshgrid(LON,LAT,indexing='ij')
+	x,y=x.ravel(),y.ravel()
+	NP=len(x)
+	n=len(LAT)
+	triangles=[]
+	for i in range(len(LON)-1):
+		for j in range(n-1):
+			a,b,c,d=i*n+j,(i+1)*n+j,(i+1)*n+j+1,i*n+j+1
+			triangles+=[(a,b,c),(a,c,d)]
+	with open(os.path.join(directory,'fort.14'),'w') as f:
+		f.write('grid\n%d %d\n' % (len(triangles),NP))
+		for k in range(NP):
+			f.write('%d %.10f %.10f 5.0\n' % (k+1,x[k],y[k]))
+		for k,(a,b,c) in enumerate(triangles):
+			f.write('%d 3 %d %d %d\n' % (k+1,a+1,b+1,c+1))
+		f.write('0\n0\n0\n0\n')
+	with open(os.path.join(directory,'maxele.63'),'w') as f:
+		f.write(' RUN ID grid\n%10d%11d 3.6E+003 10 1\n' % (1,NP))
+		f.write(' 3.6E+003 10\n')
+		for k in range(NP):
+			f.write('%10d %20.10E\n' % (k+1,eta[k]))
+	return x,y
+
+
+def test_batch_includes_provinces_with_only_shoreline_warnings(tmp_path):
+	directory=str(tmp_path)
+	write_shapefiles(directory)
+	NP=len(LON)*len(LAT)
+	#every node is wet, the ones in the eastern column the highest
+	x,y=np.meshgrid(LON,LAT,indexing='ij')
+	eta=np.where(x.ravel()==LON[-1],2.5+y.ravel()-LAT[0],0.5)
+	write_mesh(directory,eta)
+	neighbors=os.path.join(directory,'neighbors')+os.sep
+	os.makedirs(neighbors)
+
+	batch=WarningsBatch(*[os.path.join(directory,name) for name in ('towns.shp','barangays.shp','provinces.shp')],
+		None,os.path.join(directory,'fort.14'),None,os.path.join(directory,'maxele.63'),None,0,neighbors)
+	assert batch.provinces==['Inland','Coastal']
+
+	batch.generateWarnings()
+	coastal=batch.provinceWarnings['Coastal']
+	assert coastal.warnings==[]
+	assert len(coastal.shorelineWarnings)==1
+	town,elevation=coastal.shorelineWarnings[0]
+	assert town=='CoastalTown'
+	assert np.isclose(elevation,eta.max())
+	assert batch.provinceWarnings['Inland'].warnings
+
+	batch.writeToFile(directory+os.sep)
+	with open(os.path.join(directory,'Coastal.warnings')) as f:
+		assert 'Shoreline Warnings:' in f.read()